@@ -0,0 +1,279 @@
+"""
+Deadlines and hedging for LLM calls.
+
+Every call gets a deadline per prompt kind. For hedged kinds, if the reply
+hasn't come back by the recent p95 latency, a duplicate request is fired and
+whichever answers first wins. Hedges are capped to a share of calls, so a
+slow provider can't double the spend. Transient provider errors (rate limits,
+server errors) are retried while the deadline allows.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, TypeVar
+
+from app.metrics import LLM_DEADLINES_EXCEEDED, LLM_HEDGES, LLM_PROVIDER_RETRIES
+
+T = TypeVar("T")
+
+
+def _seconds(kind: str, default: float) -> float:
+    return float(os.getenv(f"LLM_DEADLINE_{kind.upper()}", default))
+
+
+# Seconds an LLM call may take before it is given up on, per prompt kind
+LLM_DEADLINES_SECONDS: Dict[str, float] = {
+    "grade": _seconds("grade", 8),
+    "narrative": _seconds("narrative", 30),
+    "subtopics": _seconds("subtopics", 30),
+    "flashcards": _seconds("flashcards", 60),
+}
+
+# Kinds whose calls are hedged
+HEDGED_KINDS = ("grade", "narrative")
+
+# Most hedges as a share of calls, per kind
+HEDGE_BUDGET_RATIO = float(os.getenv("LLM_HEDGE_BUDGET_RATIO", "0.1"))
+
+# Hedges allowed on top of the ratio, so the first slow calls can be hedged
+HEDGE_BUDGET_BURST = 5
+
+# Retries of a call after transient provider errors, the first one after
+# this many seconds and each next one after twice as long; retries that
+# wouldn't start before the deadline aren't made
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = 0.5
+
+# Status codes worth retrying, as the OpenAI client itself would
+RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+# Latencies kept per kind to estimate p95, and how many are needed first
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# Threads running LLM calls; calls past their deadline keep a thread until
+# the client's own timeout ends them
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+    thread_name_prefix="llm",
+)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """
+    An LLM call (and its hedge, if any) did not answer before its deadline.
+    """
+
+
+class LLMProviderError(RuntimeError):
+    """
+    An LLM call failed on the provider's side (e.g. it was rate limited or
+    the server erred), after any retries.
+    """
+
+
+def is_client_timeout(error: BaseException) -> bool:
+    """
+    Whether an LLM call failed because the client's own timeout ran out.
+    """
+    # Only reached once a call has failed, so the client is already loaded
+    import httpx
+    from openai import APITimeoutError
+
+    return isinstance(error, (TimeoutError, APITimeoutError, httpx.TimeoutException))
+
+
+def is_provider_error(error: BaseException) -> bool:
+    """
+    Whether an LLM call failed with an error from the provider's API, other
+    than the client's timeout.
+    """
+    from openai import APIError
+
+    return isinstance(error, APIError) and not is_client_timeout(error)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed LLM call may succeed if made again.
+    """
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return isinstance(error, APIConnectionError) and not is_client_timeout(error)
+
+
+def provider_error(kind: str, error: BaseException) -> LLMProviderError:
+    return LLMProviderError(f"LLM call for {kind} failed: {error}")
+
+
+def deadline_exceeded(kind: str) -> LLMDeadlineExceeded:
+    """
+    Count a missed deadline and build the error to raise for it.
+    """
+    LLM_DEADLINES_EXCEEDED.inc(kind=kind)
+    return LLMDeadlineExceeded(
+        f"LLM call for {kind} missed its {LLM_DEADLINES_SECONDS.get(kind)}s deadline"
+    )
+
+
+class LatencyTracker:
+    """
+    Recent call latencies of one prompt kind.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < LATENCY_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class HedgeBudget:
+    """
+    Allows a hedge only while hedges stay under HEDGE_BUDGET_RATIO of calls.
+
+    Every call earns `ratio` of a hedge and at most `burst` hedges are saved
+    up, so over any run of calls there are at most `ratio` times as many
+    hedges plus `burst`, however many fast calls came before it.
+    """
+
+    def __init__(
+        self, ratio: float = HEDGE_BUDGET_RATIO, burst: int = HEDGE_BUDGET_BURST
+    ):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.burst)
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_latencies: Dict[str, LatencyTracker] = {}
+_budgets: Dict[str, HedgeBudget] = {}
+_registry_lock = threading.Lock()
+
+
+def _stats(kind: str):
+    with _registry_lock:
+        if kind not in _latencies:
+            _latencies[kind] = LatencyTracker()
+            _budgets[kind] = HedgeBudget()
+        return _latencies[kind], _budgets[kind]
+
+
+def call_with_deadline(call: Callable[[], T], kind: str) -> T:
+    """
+    Run an LLM call within its kind's deadline, hedging it if it is slow.
+
+    The call runs in the LLM thread pool with the caller's context, so usage
+    is still charged to the caller's lobby, the hedge's included.
+
+    Args:
+        call: Makes the request and returns its reply.
+        kind (str): The prompt kind, for the deadline, p95 and hedge budget.
+
+    Returns:
+        The first reply to come back.
+
+    Raises:
+        LLMDeadlineExceeded: If no reply came back before the deadline, or the
+            client timed out the request.
+        LLMProviderError: If the provider's API failed the request, and
+            retrying it didn't help or didn't fit before the deadline.
+    """
+    deadline = LLM_DEADLINES_SECONDS.get(kind)
+    latencies, budget = _stats(kind)
+    budget.record_call()
+
+    def timed():
+        start = time.perf_counter()
+        result = call()
+        latencies.observe(time.perf_counter() - start)
+        return result
+
+    requests: List[Future] = []
+
+    def submit() -> Future:
+        future = _executor.submit(contextvars.copy_context().run, timed)
+        requests.append(future)
+        return future
+
+    start = time.perf_counter()
+    try:
+        pending = {submit()}
+
+        hedge_after = latencies.p95() if kind in HEDGED_KINDS else None
+        if hedge_after is not None and (deadline is None or hedge_after < deadline):
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done and budget.try_hedge():
+                LLM_HEDGES.inc(kind=kind)
+                pending.add(submit())
+
+        def remaining() -> Optional[float]:
+            if deadline is None:
+                return None
+            return max(deadline - (time.perf_counter() - start), 0)
+
+        error = None
+        retries = 0
+        while pending:
+            done, pending = wait(
+                pending, timeout=remaining(), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+            # Once no request is left, retry a transient error if there's time
+            backoff = RETRY_BACKOFF_SECONDS * 2**retries
+            if (
+                not pending
+                and retries < LLM_MAX_RETRIES
+                and is_transient(error)
+                and (remaining() is None or remaining() > backoff)
+            ):
+                retries += 1
+                LLM_PROVIDER_RETRIES.inc(kind=kind)
+                time.sleep(backoff)
+                pending = {submit()}
+
+        if error is not None and not pending:
+            if is_provider_error(error):
+                raise provider_error(kind, error) from error
+            # The client's timeout matches the deadline, so it may fire first
+            if not is_client_timeout(error):
+                raise error
+        raise deadline_exceeded(kind) from error
+    finally:
+        # Requests still queued for a thread are dropped rather than made
+        # (and billed) for a caller that has moved on; ones already sent
+        # run until the client's timeout
+        for future in requests:
+            future.cancel()
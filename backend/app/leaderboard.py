@@ -0,0 +1,188 @@
+import datetime
+import heapq
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# Leaderboards are split across this many sorted sets so no single key grows
+# with the whole user base; reads fan out to every shard in one pipeline
+LEADERBOARD_SHARDS = int(os.getenv("LEADERBOARD_SHARDS", "16"))
+
+WEEKLY_LEADERBOARD_TTL_SECONDS = 5 * 7 * 24 * 60 * 60
+
+LEADERBOARD_PERIODS = ("global", "weekly")
+
+# Updates a player's stats and leaderboard entries in one atomic step, since
+# the streak needs a read-modify-write.
+#
+# KEYS[1]: user stats hash, KEYS[2]: global shard, KEYS[3]: weekly shard
+# ARGV: user_id, correct (0/1), response_ms, points, new_game (0/1),
+#       weekly TTL, display name
+RECORD_ANSWER_SCRIPT = """
+local stats = KEYS[1]
+redis.call('HINCRBY', stats, 'answers', 1)
+redis.call('HINCRBY', stats, 'response_ms_total', ARGV[3])
+redis.call('HSET', stats, 'display_name', ARGV[7])
+if ARGV[5] == '1' then
+    redis.call('HINCRBY', stats, 'games_played', 1)
+end
+if ARGV[2] == '1' then
+    redis.call('HINCRBY', stats, 'correct', 1)
+    local streak = redis.call('HINCRBY', stats, 'streak', 1)
+    local best = tonumber(redis.call('HGET', stats, 'best_streak') or '0')
+    if streak > best then
+        redis.call('HSET', stats, 'best_streak', streak)
+    end
+    redis.call('HINCRBYFLOAT', stats, 'points', ARGV[4])
+    redis.call('ZINCRBY', KEYS[2], ARGV[4], ARGV[1])
+    redis.call('ZINCRBY', KEYS[3], ARGV[4], ARGV[1])
+    redis.call('EXPIRE', KEYS[3], ARGV[6])
+else
+    redis.call('HSET', stats, 'streak', 0)
+end
+return 1
+"""
+
+
+def user_stats_key(user_id: str) -> str:
+    return f"user:{user_id}:stats"
+
+
+def leaderboard_shard(user_id: str) -> int:
+    return zlib.crc32(user_id.encode()) % LEADERBOARD_SHARDS
+
+
+def current_week(now: Optional[datetime.date] = None) -> str:
+    year, week, _ = (now or datetime.date.today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def leaderboard_key(period: str, shard: int, week: Optional[str] = None) -> str:
+    if period == "weekly":
+        return f"leaderboard:weekly:{week or current_week()}:{shard}"
+    return f"leaderboard:global:{shard}"
+
+
+async def record_answer(
+    conn,
+    user_id: str,
+    player_name: str,
+    correct: bool,
+    response_time: float,
+    points: float = 0.0,
+    new_game: bool = False,
+) -> None:
+    """
+    Fold a graded answer into the player's stats and the leaderboards.
+
+    Args:
+        conn: The Redis connection holding user stats and leaderboards.
+        user_id (str): The player who answered.
+        player_name (str): The name the player is using, shown on leaderboards.
+        correct (bool): Whether the answer was graded correct.
+        response_time (float): Seconds between the round start and the answer.
+        points (float): Points awarded for the answer.
+        new_game (bool): Whether this is the player's first graded answer in the lobby.
+    """
+    shard = leaderboard_shard(user_id)
+    script = conn.register_script(RECORD_ANSWER_SCRIPT)
+    await script(
+        keys=[
+            user_stats_key(user_id),
+            leaderboard_key("global", shard),
+            leaderboard_key("weekly", shard),
+        ],
+        args=[
+            user_id,
+            1 if correct else 0,
+            max(int(response_time * 1000), 0),
+            points,
+            1 if new_game else 0,
+            WEEKLY_LEADERBOARD_TTL_SECONDS,
+            player_name,
+        ],
+    )
+
+
+async def top_players(
+    conn, period: str = "global", k: int = 10
+) -> List[Tuple[str, str, float]]:
+    """
+    Top `k` players across every leaderboard shard.
+
+    Each shard returns at most `k` entries, so the merge touches
+    `LEADERBOARD_SHARDS * k` entries regardless of how many users exist.
+
+    Returns:
+        List[Tuple[str, str, float]]: (user_id, display_name, points) by descending points.
+    """
+    week = current_week()
+    async with conn.pipeline(transaction=False) as pipe:
+        for shard in range(LEADERBOARD_SHARDS):
+            pipe.zrevrange(
+                leaderboard_key(period, shard, week), 0, k - 1, withscores=True
+            )
+        shard_rankings = await pipe.execute()
+
+    leaders = heapq.nlargest(
+        k,
+        (entry for ranking in shard_rankings for entry in ranking),
+        key=lambda entry: entry[1],
+    )
+    if not leaders:
+        return []
+
+    async with conn.pipeline(transaction=False) as pipe:
+        for user_id, _ in leaders:
+            pipe.hget(user_stats_key(user_id), "display_name")
+        names = await pipe.execute()
+
+    return [
+        (user_id, name if name else "Unknown Player", score)
+        for (user_id, score), name in zip(leaders, names)
+    ]
+
+
+async def player_rank(conn, user_id: str, period: str = "global") -> Optional[int]:
+    """
+    1-based rank of a player on a leaderboard, or None if they have no points yet.
+    """
+    week = current_week()
+    score = await conn.zscore(
+        leaderboard_key(period, leaderboard_shard(user_id), week), user_id
+    )
+    if score is None:
+        return None
+
+    async with conn.pipeline(transaction=False) as pipe:
+        for shard in range(LEADERBOARD_SHARDS):
+            pipe.zcount(leaderboard_key(period, shard, week), f"({score}", "+inf")
+        ahead = await pipe.execute()
+
+    return sum(ahead) + 1
+
+
+async def user_dashboard(conn, user_id: str) -> Dict[str, object]:
+    """
+    Lifetime stats and leaderboard ranks for one player.
+    """
+    stats = await conn.hgetall(user_stats_key(user_id))
+    answers = int(stats.get("answers", 0))
+    correct = int(stats.get("correct", 0))
+
+    return {
+        "user_id": user_id,
+        "display_name": stats.get("display_name"),
+        "games_played": int(stats.get("games_played", 0)),
+        "answers": answers,
+        "correct": correct,
+        "accuracy": correct / answers if answers else 0.0,
+        "average_response_time": (
+            int(stats.get("response_ms_total", 0)) / answers / 1000 if answers else 0.0
+        ),
+        "points": float(stats.get("points", 0)),
+        "current_streak": int(stats.get("streak", 0)),
+        "best_streak": int(stats.get("best_streak", 0)),
+        "global_rank": await player_rank(conn, user_id, "global"),
+        "weekly_rank": await player_rank(conn, user_id, "weekly"),
+    }
@@ -0,0 +1,167 @@
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from app.metrics import LLM_COST_USD, LLM_TOKENS
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES_PER_MILLION: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# Once a lobby has spent this much, it stops calling the LLM
+LOBBY_SPEND_CAP_USD = float(os.getenv("LOBBY_SPEND_CAP_USD", "0.50"))
+
+LLM_USAGE_TTL_SECONDS = 24 * 60 * 60
+
+# Totals across every lobby, one field per template, model and measure
+GLOBAL_USAGE_KEY = "llm_usage"
+
+
+class UsageRecord(NamedTuple):
+    template: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    cost: float
+
+
+class UsageLedger:
+    """
+    Usage of the LLM calls made on behalf of one lobby.
+
+    Calls run in executor threads and append here; the event loop then writes
+    the totals to Redis with `flush_usage`.
+    """
+
+    def __init__(self, lobby_id: str):
+        self.lobby_id = lobby_id
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+
+# The ledger LLM calls are charged to; copied into threads by asyncio.to_thread
+current_ledger: ContextVar[Optional[UsageLedger]] = ContextVar(
+    "llm_usage_ledger", default=None
+)
+
+
+@contextmanager
+def lobby_usage(lobby_id: str) -> Iterator[UsageLedger]:
+    """
+    Charge the LLM calls made inside the block to a lobby.
+    """
+    ledger = UsageLedger(lobby_id)
+    token = current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        current_ledger.reset(token)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def record_usage(template: str, model: str, message, latency: float) -> None:
+    """
+    Account for one LLM reply.
+
+    Args:
+        template (str): The prompt template that was used.
+        model (str): The model that answered.
+        message: The reply message; its `usage_metadata` holds the token counts.
+        latency (float): Seconds the call took.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    LLM_TOKENS.inc(prompt_tokens, template=template, model=model, type="prompt")
+    LLM_TOKENS.inc(completion_tokens, template=template, model=model, type="completion")
+    LLM_COST_USD.inc(cost, template=template, model=model)
+
+    ledger = current_ledger.get()
+    if ledger is not None:
+        ledger.add(
+            UsageRecord(
+                template, model, prompt_tokens, completion_tokens, latency, cost
+            )
+        )
+
+
+def lobby_usage_key(lobby_id: str) -> str:
+    return f"lobby:{lobby_id}:llm_usage"
+
+
+def _add_usage(pipe, key: str, record: UsageRecord) -> None:
+    prefix = f"{record.template}:{record.model}"
+    pipe.hincrby(key, f"{prefix}:calls", 1)
+    pipe.hincrby(key, f"{prefix}:prompt_tokens", record.prompt_tokens)
+    pipe.hincrby(key, f"{prefix}:completion_tokens", record.completion_tokens)
+    pipe.hincrby(key, f"{prefix}:latency_ms", int(record.latency * 1000))
+    pipe.hincrbyfloat(key, f"{prefix}:cost_usd", record.cost)
+
+
+async def flush_usage(lobby_conn, global_conn, ledger: UsageLedger) -> None:
+    """
+    Add a ledger's usage to the lobby's and the global counters in Redis.
+
+    Args:
+        lobby_conn: The Redis connection holding the lobby's keys.
+        global_conn: The Redis connection holding the global counters.
+        ledger (UsageLedger): The usage to add.
+    """
+    if not ledger.records:
+        return
+
+    lobby_key = lobby_usage_key(ledger.lobby_id)
+    async with lobby_conn.pipeline(transaction=False) as pipe:
+        for record in ledger.records:
+            _add_usage(pipe, lobby_key, record)
+            pipe.hincrbyfloat(lobby_key, "cost_usd", record.cost)
+        pipe.expire(lobby_key, LLM_USAGE_TTL_SECONDS)
+        await pipe.execute()
+
+    async with global_conn.pipeline(transaction=False) as pipe:
+        for record in ledger.records:
+            _add_usage(pipe, GLOBAL_USAGE_KEY, record)
+        await pipe.execute()
+
+
+async def lobby_spend(conn, lobby_id: str) -> float:
+    spent = await conn.hget(lobby_usage_key(lobby_id), "cost_usd")
+    return float(spent) if spent else 0.0
+
+
+async def over_spend_cap(conn, lobby_id: str) -> bool:
+    return await lobby_spend(conn, lobby_id) >= LOBBY_SPEND_CAP_USD
+
+
+async def usage_report(conn, lobby_id: str) -> Dict[str, object]:
+    """
+    A lobby's usage grouped by "template:model", plus its total cost.
+    """
+    fields = await conn.hgetall(lobby_usage_key(lobby_id))
+    report: Dict[str, Dict[str, float]] = {}
+    for field, value in fields.items():
+        if field == "cost_usd":
+            continue
+        template, model, measure = field.rsplit(":", 2)
+        report.setdefault(f"{template}:{model}", {})[measure] = float(value)
+    return {
+        "cost_usd": float(fields.get("cost_usd", 0)),
+        "spend_cap_usd": LOBBY_SPEND_CAP_USD,
+        "by_template": report,
+    }
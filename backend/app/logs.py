@@ -0,0 +1,44 @@
+import json
+import logging
+import os
+import random
+
+logger = logging.getLogger("app")
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Fraction of routine events that are logged; errors are always logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Prompts and replies are cut to this many characters in log lines
+LOG_TEXT_LIMIT = 200
+
+
+def truncate(text: str, limit: int = LOG_TEXT_LIMIT) -> str:
+    text = str(text)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def log_event(event: str, level: int = logging.INFO, sampled: bool = True, **fields):
+    """
+    Log an event as a single JSON line.
+
+    Args:
+        event (str): Short name of what happened.
+        level (int): Logging level of the line.
+        sampled (bool): Whether to keep only `LOG_SAMPLE_RATE` of these events.
+        **fields: Extra context to include in the line.
+    """
+    if sampled and random.random() >= LOG_SAMPLE_RATE:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str))
+
+
+def log_error(event: str, error: Exception, **fields):
+    """
+    Log a failure; never sampled.
+    """
+    log_event(event, level=logging.ERROR, sampled=False, error=repr(error), **fields)
@@ -1,53 +1,147 @@
 # backend/main.py
 import asyncio
 import json
+import math
 import os
 import re
+import time
 import uuid
-from urllib.parse import urlparse
-
-import redis.asyncio as redis
+from typing import Literal, Optional
+
+from app import metrics
+from app.leaderboard import (
+    LEADERBOARD_PERIODS,
+    record_answer,
+    top_players,
+    user_dashboard,
+)
+from app.llm_usage import flush_usage, lobby_usage, over_spend_cap, usage_report
+from app.rate_limit import check_rate_limit
+from app.redis_client import InstrumentedRedis
+from app.round_cache import ROUNDS_INVALIDATION_CHANNEL, RoundDataCache
+from app.round_timer import (
+    current_round,
+    end_round_if_everyone_scored,
+    run_round_scheduler,
+    start_rounds,
+)
 from app.schemas import Rounds
-from app.utils import generate_bullets_from_topic, grade_individual_answer
+from app.scoring import (
+    claim_sentence_pick,
+    mark_player_graded,
+    record_correct_answer,
+    top_scores,
+)
+from app.session import GAME_PHASE, LOBBY_PHASE, get_phase, transition_phase
+from app.sharding import RedisRouter
+from app.snapshot import (
+    PHASE_SECTION,
+    PLAYERS_SECTION,
+    SCOREBOARD_SECTION,
+    SECTIONS,
+    bump_version,
+    lobby_snapshot,
+    public_rounds,
+)
+from app.utils import (
+    generate_bullets_from_topic,
+    grade_individual_answer,
+    grade_sentence_pick,
+    heuristic_grade,
+)
 from fastapi import (
     Depends,
     FastAPI,
     File,
     HTTPException,
     Query,
+    Request,
     UploadFile,
     WebSocket,
     WebSocketDisconnect,
 )
 from fastapi.background import BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 app = FastAPI()
 
-REDIS_URL = urlparse(os.environ.get("REDIS_URL", "redis://redis"))
-
 # Configuration via environment variables
-REDIS_HOST = REDIS_URL.hostname
-REDIS_PORT = REDIS_URL.port
-REDIS_PASSWORD = REDIS_URL.password
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 
-# Initialize Redis connection on startup
-conn = None
+# Initialize Redis connections on startup. Lobby keys and channels are spread
+# over the nodes in REDIS_NODES; everything else lives on the primary node.
+redis_router = None
+primary_conn = None
+
+# Parsed round data, shared by every request handled by this worker
+round_cache = RoundDataCache()
+round_invalidation_task = None
+round_scheduler_task = None
 
 
 @app.on_event("startup")
 async def startup_event():
-    global conn
-    conn = redis.Redis(
-        host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, decode_responses=True
-    )
+    global redis_router, primary_conn, round_invalidation_task, round_scheduler_task
+    redis_router = RedisRouter()
+    primary_conn = redis_router.primary
+    round_invalidation_task = asyncio.create_task(listen_for_round_invalidations())
+    round_scheduler_task = asyncio.create_task(run_round_scheduler(redis_router))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    await conn.close()
+    round_invalidation_task.cancel()
+    round_scheduler_task.cancel()
+    await redis_router.close()
+
+
+def lobby_conn(lobby_id: str):
+    """
+    The Redis connection holding a lobby's keys and Pub/Sub channel.
+    """
+    return redis_router.for_lobby(lobby_id)
+
+
+async def listen_for_round_invalidations():
+    """
+    Drop this worker's cached round data whenever a lobby's rounds are regenerated.
+    """
+    while True:
+        pubsub = primary_conn.pubsub()
+        try:
+            await pubsub.subscribe(ROUNDS_INVALIDATION_CHANNEL)
+            with metrics.SUBSCRIBED_CHANNELS.track():
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    event = json.loads(message["data"])
+                    round_cache.invalidate(event["lobby_id"], event["version"])
+        except asyncio.CancelledError:
+            await pubsub.close()
+            raise
+        except Exception:
+            # Invalidations may have been missed while disconnected
+            round_cache.clear()
+            await pubsub.close()
+            await asyncio.sleep(1)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+
+    # Label by route template so lobby IDs don't each become a series
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code,
+    )
+    return response
 
 
 # Allow CORS for frontend
@@ -64,6 +158,9 @@ LOBBY_ID_REGEX = re.compile(r"^[a-f0-9]{32}$")
 
 class CreateLobbyRequest(BaseModel):
     topic: str
+    # "text": players type what they think is wrong, graded by the LLM;
+    # "sentence": players pick the wrong sentence, graded locally
+    answer_mode: Literal["text", "sentence"] = "text"
 
 
 class CreateLobbyResponse(BaseModel):
@@ -80,6 +177,38 @@ class ChatMessage(BaseModel):
     type: str
     playerName: str
     message: str
+    user_id: Optional[str] = None
+
+
+class ScoreboardEntry(BaseModel):
+    user_id: str
+    player_name: str
+    score: float
+
+
+class ScoreboardResponse(BaseModel):
+    lobby_id: str
+    scores: list[ScoreboardEntry]
+
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    scores: list[ScoreboardEntry]
+
+
+async def enforce_rate_limit(route: str, user_key: str, lobby_id: str):
+    """
+    Reject the request with a 429 if the user or the lobby is over its limit for the route.
+    """
+    # Both buckets sit on the lobby's node so one script can charge them together
+    limited = await check_rate_limit(lobby_conn(lobby_id), route, user_key, lobby_id)
+    if limited:
+        scope, retry_after = limited
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests for this {scope}",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
 
 
 @app.post("/create-lobby", response_model=CreateLobbyResponse)
@@ -87,15 +216,22 @@ async def create_lobby(request: CreateLobbyRequest):
     lobby_id = uuid.uuid4().hex
     creator_id = uuid.uuid4().hex  # Generate a unique creator ID
     topic = request.topic
+    conn = lobby_conn(lobby_id)
 
     # Store lobby information with the actual creator ID and topic
     await conn.hset(
-        f"lobby:{lobby_id}", mapping={"creator": creator_id, "topic": topic}
+        f"lobby:{lobby_id}",
+        mapping={
+            "creator": creator_id,
+            "topic": topic,
+            "answer_mode": request.answer_mode,
+        },
     )
     await conn.sadd(f"lobby:{lobby_id}:participants", creator_id)
     await conn.hset(
         f"lobby:{lobby_id}:players", creator_id, "Host"
     )  # Name the host as "Host"
+    await bump_version(conn, lobby_id, *SECTIONS)
 
     return CreateLobbyResponse(lobby_id=lobby_id, creator_id=creator_id)
 
@@ -105,14 +241,20 @@ async def get_lobby(lobby_id: str):
     if not LOBBY_ID_REGEX.match(lobby_id):
         raise HTTPException(status_code=400, detail="Invalid lobby ID format")
 
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
 
-    creator_id = await conn.hget(lobby_key, "creator")
-    topic = await conn.hget(lobby_key, "topic")
+    creator_id, topic, answer_mode = await conn.hmget(
+        lobby_key, "creator", "topic", "answer_mode"
+    )
 
-    return {"creator_id": creator_id, "topic": topic}
+    return {
+        "creator_id": creator_id,
+        "topic": topic,
+        "answer_mode": answer_mode or "text",
+    }
 
 
 @app.get("/lobby/{lobby_id}/topic", response_model=dict)
@@ -123,6 +265,7 @@ async def get_topic(lobby_id: str):
     if not LOBBY_ID_REGEX.match(lobby_id):
         raise HTTPException(status_code=400, detail="Invalid lobby ID format")
 
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
@@ -136,21 +279,58 @@ async def get_topic(lobby_id: str):
 
 @app.get("/lobby/{lobby_id}/participants", response_model=dict)
 async def get_participants(lobby_id: str):
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}:participants"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
 
-    participants = await conn.smembers(lobby_key)
-    players = []
-    for user_id in participants:
-        player_name = await conn.hget(f"lobby:{lobby_id}:players", user_id)
-        players.append(player_name if player_name else "Unknown Player")
+    participants = list(await conn.smembers(lobby_key))
+    names = await conn.hmget(f"lobby:{lobby_id}:players", participants)
+    players = [
+        player_name if player_name else "Unknown Player" for player_name in names
+    ]
 
     return {"players": players}
 
 
+@app.get("/lobby/{lobby_id}/snapshot", response_model=dict)
+async def get_lobby_snapshot(lobby_id: str, since: Optional[int] = Query(None, ge=0)):
+    """
+    Everything a (re)connecting client needs about a lobby in one call: topic,
+    host, players, phase, round-data version and scoreboard, tagged with the
+    lobby version. With `since`, only the parts changed after that version.
+    """
+    if not LOBBY_ID_REGEX.match(lobby_id):
+        raise HTTPException(status_code=400, detail="Invalid lobby ID format")
+
+    snapshot = await lobby_snapshot(lobby_conn(lobby_id), lobby_id, since)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Lobby does not exist")
+    return snapshot
+
+
+@app.get("/lobby/{lobby_id}/rounds", response_model=dict)
+async def get_rounds(lobby_id: str, version: Optional[int] = Query(None, ge=1)):
+    """
+    A lobby's round data without the answers, e.g. for a client that
+    reconnected mid-game. With `version`, the round version from the
+    snapshot, a 409 means the rounds were regenerated since.
+    """
+    if not LOBBY_ID_REGEX.match(lobby_id):
+        raise HTTPException(status_code=400, detail="Invalid lobby ID format")
+
+    round_version, round_data = await public_rounds(lobby_conn(lobby_id), lobby_id)
+    if round_data is None:
+        raise HTTPException(status_code=404, detail="Round data not found")
+    if version is not None and version != round_version:
+        raise HTTPException(status_code=409, detail="The round data has changed")
+
+    return {"lobby_id": lobby_id, "version": round_version, "roundData": round_data}
+
+
 @app.post("/lobby/{lobby_id}/join")
 async def join_lobby(lobby_id: str, request: JoinLobbyRequest):
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
@@ -160,6 +340,7 @@ async def join_lobby(lobby_id: str, request: JoinLobbyRequest):
 
     # Store player_name mapping
     await conn.hset(f"{lobby_key}:players", request.user_id, request.player_name)
+    await bump_version(conn, lobby_id, PLAYERS_SECTION)
 
     # Notify via Pub/Sub that a new player has joined
     await conn.publish(
@@ -172,6 +353,7 @@ async def join_lobby(lobby_id: str, request: JoinLobbyRequest):
 
 @app.post("/lobby/{lobby_id}/start")
 async def start_game(lobby_id: str, request: JoinLobbyRequest):
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
@@ -180,14 +362,21 @@ async def start_game(lobby_id: str, request: JoinLobbyRequest):
     if creator_id != request.user_id:
         raise HTTPException(status_code=403, detail="Only the host can start the game")
 
+    if not await transition_phase(conn, lobby_id, LOBBY_PHASE, GAME_PHASE):
+        raise HTTPException(status_code=409, detail="The game has already started")
+    await bump_version(conn, lobby_id, PHASE_SECTION)
+
     # Notify all participants via Pub/Sub to start the game
-    await conn.publish(f"channel:{lobby_id}", json.dumps({"type": "start_game"}))
+    await conn.publish(
+        f"channel:{lobby_id}", json.dumps({"type": "start_game", "phase": GAME_PHASE})
+    )
 
     return {"detail": "Game started successfully"}
 
 
 @app.get("/lobby/{lobby_id}/paragraphs")
 async def get_paragraphs(lobby_id: str):
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
@@ -205,11 +394,17 @@ async def get_paragraphs(lobby_id: str):
 
 
 @app.post("/lobby/{lobby_id}/chat")
-async def chat(lobby_id: str, message: ChatMessage):
+async def chat(lobby_id: str, message: ChatMessage, request: Request):
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
 
+    # Some servers and proxies leave the client address unknown; those
+    # anonymous senders share one limit
+    sender = message.user_id or (request.client.host if request.client else "anonymous")
+    await enforce_rate_limit("chat", sender, lobby_id)
+
     # Broadcast the chat message to all participants via Pub/Sub
     await conn.publish(
         f"channel:{lobby_id}",
@@ -231,9 +426,8 @@ import json
 from fastapi import WebSocket, WebSocketDisconnect
 
 
-async def websocket_receiver(
-    websocket: WebSocket, lobby_id: str, user_id: str, is_game_start: asyncio.Event
-):
+async def websocket_receiver(websocket: WebSocket, lobby_id: str, user_id: str):
+    conn = lobby_conn(lobby_id)
     channel = f"channel:{lobby_id}"
     try:
         while True:
@@ -241,24 +435,51 @@ async def websocket_receiver(
             message = json.loads(data)
 
             if message["type"] == "start_game_initiated":
-                # Set the event to signal that the game is starting
-                is_game_start.set()
-                # Broadcast to all other players that the game is starting
-                await conn.publish(
-                    channel, json.dumps({"type": "start_game", "initiatedByHost": True})
-                )
-                return
+                # Switch the lobby to the game phase in-band; every player keeps
+                # this socket, so nobody reconnects
+                creator_id = await conn.hget(f"lobby:{lobby_id}", "creator")
+                if user_id != creator_id:
+                    continue
+                if await transition_phase(conn, lobby_id, LOBBY_PHASE, GAME_PHASE):
+                    await bump_version(conn, lobby_id, PHASE_SECTION)
+                    # Broadcast to all players that the game is starting
+                    await conn.publish(
+                        channel,
+                        json.dumps(
+                            {
+                                "type": "start_game",
+                                "phase": GAME_PHASE,
+                                "initiatedByHost": True,
+                            }
+                        ),
+                    )
 
             elif message["type"] == "transitioning_to_game":
-                # Set the event indicating the user is intentionally transitioning to the game
-                is_game_start.set()
-                return
+                # Older clients announce this before reconnecting; the session
+                # socket now carries on into the game, so there is nothing to do
+                continue
 
             elif message["type"] == "chat_message":
+                limited = await check_rate_limit(conn, "chat", user_id, lobby_id)
+                if limited:
+                    # Only the sender hears about it; nothing is broadcast
+                    scope, retry_after = limited
+                    await websocket.send_text(
+                        json.dumps(
+                            {
+                                "type": "error",
+                                "code": "rate_limited",
+                                "message": f"Too many messages for this {scope}",
+                                "retryAfter": retry_after,
+                            }
+                        )
+                    )
+                    continue
+
                 # Broadcast the chat message to all players in the lobby
                 player_name = message.get("playerName")
                 chat_message = message.get("message")
-                user_id = message.get("user_id")
+                sender_id = message.get("user_id")
 
                 await conn.publish(
                     channel,
@@ -267,41 +488,45 @@ async def websocket_receiver(
                             "type": "chat_message",
                             "playerName": player_name,
                             "message": chat_message,
-                            "user_id": user_id,
+                            "user_id": sender_id,
                         }
                     ),
                 )
 
     except WebSocketDisconnect:
         # Handle disconnect based on whether it's the host or a regular player
-        if not is_game_start.is_set():
-            lobby_key = f"lobby:{lobby_id}"
-            player_name = await conn.hget(f"{lobby_key}:players", user_id)
-            creator_id = await conn.hget(f"{lobby_key}", "creator")
-
-            # If the host disconnected ungracefully, close the lobby for everyone
-            if user_id == creator_id:
-                await conn.publish(
-                    f"channel:{lobby_id}",
-                    json.dumps(
-                        {
-                            "type": "lobby_closed",
-                            "message": "The host has disconnected. The lobby is closed.",
-                        }
-                    ),
-                )
-            else:
-                # Broadcast player left event for non-hosts
-                await conn.publish(
-                    f"channel:{lobby_id}",
-                    json.dumps({"type": "player_left", "playerName": player_name}),
-                )
+        lobby_key = f"lobby:{lobby_id}"
+        player_name = await conn.hget(f"{lobby_key}:players", user_id)
+        creator_id = await conn.hget(f"{lobby_key}", "creator")
+        phase = await get_phase(conn, lobby_id)
+
+        # If the host disconnected ungracefully before the game, close the lobby for everyone
+        if user_id == creator_id and phase == LOBBY_PHASE:
+            await conn.publish(
+                f"channel:{lobby_id}",
+                json.dumps(
+                    {
+                        "type": "lobby_closed",
+                        "message": "The host has disconnected. The lobby is closed.",
+                    }
+                ),
+            )
+        else:
+            # Broadcast player left event
+            await conn.publish(
+                f"channel:{lobby_id}",
+                json.dumps({"type": "player_left", "playerName": player_name}),
+            )
 
 
 @app.websocket("/ws/{lobby_id}")
 async def websocket_endpoint(websocket: WebSocket, lobby_id: str):
     await websocket.accept()
+    with metrics.OPEN_WEBSOCKETS.track():
+        await serve_lobby_socket(websocket, lobby_id)
 
+
+async def serve_lobby_socket(websocket: WebSocket, lobby_id: str):
     # Extract 'user_id' from query parameters
     user_id = websocket.query_params.get("user_id")
     if not user_id:
@@ -313,6 +538,7 @@ async def websocket_endpoint(websocket: WebSocket, lobby_id: str):
         await websocket.close(code=1008, reason="Invalid lobby ID format")
         return
 
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
 
     # Check if the lobby still exists before accepting the connection
@@ -321,44 +547,50 @@ async def websocket_endpoint(websocket: WebSocket, lobby_id: str):
         return
 
     # Create Pub/Sub connection and subscribe to the lobby channel
-    pubsub_conn = redis.Redis(
-        host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, decode_responses=True
+    pubsub_conn = InstrumentedRedis.from_url(
+        redis_router.url_for(lobby_id), decode_responses=True
     )
     pubsub = pubsub_conn.pubsub()
     await pubsub.subscribe(f"channel:{lobby_id}")
-
-    # Create an asyncio Event to track if the game is starting
-    is_game_start = asyncio.Event()
+    metrics.SUBSCRIBED_CHANNELS.inc()
 
     async def send_messages():
         async for message in pubsub.listen():
             if message["type"] == "message":
-                await websocket.send_text(message["data"])
-
-    receive_task = asyncio.create_task(
-        websocket_receiver(websocket, lobby_id, user_id, is_game_start)
-    )
-    send_task = asyncio.create_task(send_messages())
+                with metrics.WEBSOCKET_SEND_SECONDS.time():
+                    await websocket.send_text(message["data"])
 
-    done, pending = await asyncio.wait(
-        [receive_task, send_task],
-        return_when=asyncio.FIRST_COMPLETED,
-    )
-    for task in pending:
-        task.cancel()
-
-    # If the game is starting, add a small delay to ensure smooth transition
-    if is_game_start.is_set():
-        await asyncio.sleep(2)  # 2-second delay to allow for game transition
-
-    # Clean up on disconnect
-    await pubsub.unsubscribe(f"channel:{lobby_id}")
-    await pubsub.close()
-    await pubsub_conn.close()
+    try:
+        # Tell the client which phase the session is in, so a page in either
+        # phase can pick up on the same socket
+        await websocket.send_text(
+            json.dumps({"type": "session", "phase": await get_phase(conn, lobby_id)})
+        )
 
-    # Only remove from participants if the user was not transitioning to the game
-    if not is_game_start.is_set():
-        await conn.srem(f"{lobby_key}:participants", user_id)
+        receive_task = asyncio.create_task(
+            websocket_receiver(websocket, lobby_id, user_id)
+        )
+        send_task = asyncio.create_task(send_messages())
+        try:
+            await asyncio.wait(
+                [receive_task, send_task],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            receive_task.cancel()
+            send_task.cancel()
+    finally:
+        # Clean up on disconnect, however the session ended
+        metrics.SUBSCRIBED_CHANNELS.dec()
+        await pubsub.unsubscribe(f"channel:{lobby_id}")
+        await pubsub.close()
+        await pubsub_conn.close()
+
+    # Only remove from participants while the lobby is still forming; once the
+    # game is on, players keep their place on the scoreboard
+    if await get_phase(conn, lobby_id) == LOBBY_PHASE:
+        if await conn.srem(f"{lobby_key}:participants", user_id):
+            await bump_version(conn, lobby_id, PLAYERS_SECTION)
 
         # Additional step: If the disconnecting user is the host, delete the lobby
         creator_id = await conn.hget(lobby_key, "creator_id")
@@ -367,6 +599,76 @@ async def websocket_endpoint(websocket: WebSocket, lobby_id: str):
             await conn.delete(lobby_key)
 
 
+@app.get("/lobby/{lobby_id}/scoreboard", response_model=ScoreboardResponse)
+async def get_scoreboard(
+    lobby_id: str,
+    k: int = Query(10, ge=1, le=100),
+    subtopic_index: Optional[int] = Query(None, ge=0),
+):
+    """
+    Get the top `k` players of a lobby, or of one round if `subtopic_index` is given.
+    """
+    if not LOBBY_ID_REGEX.match(lobby_id):
+        raise HTTPException(status_code=400, detail="Invalid lobby ID format")
+
+    scores = await top_scores(lobby_conn(lobby_id), lobby_id, k, subtopic_index)
+    return ScoreboardResponse(
+        lobby_id=lobby_id,
+        scores=[
+            ScoreboardEntry(user_id=user_id, player_name=name, score=score)
+            for user_id, name, score in scores
+        ],
+    )
+
+
+@app.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    period: str = Query("global"), k: int = Query(10, ge=1, le=100)
+):
+    """
+    Get the top `k` players of all time, or of the current week.
+    """
+    if period not in LEADERBOARD_PERIODS:
+        raise HTTPException(status_code=400, detail="Invalid leaderboard period")
+
+    leaders = await top_players(primary_conn, period, k)
+    return LeaderboardResponse(
+        period=period,
+        scores=[
+            ScoreboardEntry(user_id=user_id, player_name=name, score=score)
+            for user_id, name, score in leaders
+        ],
+    )
+
+
+@app.get("/users/{user_id}/dashboard", response_model=dict)
+async def get_user_dashboard(user_id: str):
+    """
+    Get a player's lifetime stats and leaderboard ranks.
+    """
+    return await user_dashboard(primary_conn, user_id)
+
+
+@app.get("/lobby/{lobby_id}/llm-usage", response_model=dict)
+async def get_llm_usage(lobby_id: str):
+    """
+    Get a lobby's LLM token usage and estimated cost per prompt template and model.
+    """
+    if not LOBBY_ID_REGEX.match(lobby_id):
+        raise HTTPException(status_code=400, detail="Invalid lobby ID format")
+
+    conn = lobby_conn(lobby_id)
+    return await usage_report(conn, lobby_id)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    This worker's metrics in the Prometheus text format.
+    """
+    return metrics.render()
+
+
 # @app.get("/rounds", response_model=Rounds)
 # async def get_rounds(topic: str) -> Rounds:
 #     rounds = generate_bullets_from_topic(topic)
@@ -383,6 +685,7 @@ async def start_round_generation(
     if not LOBBY_ID_REGEX.match(lobby_id):
         raise HTTPException(status_code=400, detail="Invalid lobby ID format")
 
+    conn = lobby_conn(lobby_id)
     lobby_key = f"lobby:{lobby_id}"
     if not await conn.exists(lobby_key):
         raise HTTPException(status_code=404, detail="Lobby does not exist")
@@ -391,6 +694,11 @@ async def start_round_generation(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found for this lobby")
 
+    if await over_spend_cap(conn, lobby_id):
+        raise HTTPException(
+            status_code=429, detail="This lobby has used up its LLM budget"
+        )
+
     # Schedule the round generation task to run in the background
     background_tasks.add_task(generate_and_broadcast_rounds, lobby_id, topic)
 
@@ -402,23 +710,65 @@ async def generate_and_broadcast_rounds(lobby_id: str, topic: str):
     Generate round data, store it in Redis, and broadcast it to the lobby via Pub/Sub once completed.
     The generation of rounds is run in a separate thread if it's a synchronous function.
     """
+    conn = lobby_conn(lobby_id)
     try:
-        # Run the synchronous function in a thread to avoid blocking the event loop
+        # Run the synchronous function in a thread to avoid blocking the event loop;
+        # to_thread carries the lobby's usage ledger over to it
         loop = asyncio.get_running_loop()
-        rounds = await loop.run_in_executor(None, generate_bullets_from_topic, topic)
 
-        # Store the generated round data in Redis as serialized JSON
-        rounds_key = f"lobby:{lobby_id}:round_data"
-        await conn.set(rounds_key, json.dumps(rounds.model_dump()))
+        def forward_narrative(event: dict):
+            # Called from the generation thread; publish on the event loop
+            asyncio.run_coroutine_threadsafe(
+                conn.publish(f"channel:{lobby_id}", json.dumps(event)), loop
+            )
 
-        # Optionally set an expiration time for the rounds data (e.g., 24 hours)
-        await conn.expire(rounds_key, 24 * 60 * 60)
+        with lobby_usage(lobby_id) as ledger:
+            try:
+                rounds = await asyncio.to_thread(
+                    generate_bullets_from_topic, topic, forward_narrative
+                )
+            finally:
+                await flush_usage(conn, primary_conn, ledger)
+
+        # Store the generated round data in Redis as one hash field per
+        # subtopic, so answers only fetch the subtopic they need
+        lobby_key = f"lobby:{lobby_id}"
+        subtopics_key = f"{lobby_key}:round_subtopics"
+        async with conn.pipeline(transaction=True) as pipe:
+            pipe.delete(subtopics_key)
+            pipe.hset(
+                subtopics_key,
+                mapping={
+                    index: subtopic.model_dump_json()
+                    for index, subtopic in enumerate(rounds.subtopics)
+                },
+            )
+            # Optionally set an expiration time for the rounds data (e.g., 24 hours)
+            pipe.expire(subtopics_key, 24 * 60 * 60)
+            pipe.hincrby(lobby_key, "round_version", 1)
+            *_, version = await pipe.execute()
+
+        # Tell every worker to drop its cached copy of the previous rounds
+        await primary_conn.publish(
+            ROUNDS_INVALIDATION_CHANNEL,
+            json.dumps({"lobby_id": lobby_id, "version": version}),
+        )
 
-        # Broadcast the round data to all players in the lobby
+        # Broadcast the round data to all players in the lobby, without the
+        # answers; those stay on the server for grading
         await conn.publish(
             f"channel:{lobby_id}",
-            json.dumps({"type": "round_data_ready", "roundData": rounds.model_dump()}),
+            json.dumps(
+                {
+                    "type": "round_data_ready",
+                    "roundData": rounds.public_dump(),
+                    "version": version,
+                }
+            ),
         )
+
+        # The server times the rounds from here on
+        await start_rounds(conn, lobby_id, len(rounds.subtopics))
     except Exception as e:
         # Handle any errors that occur during round generation
         await conn.publish(
@@ -431,42 +781,131 @@ async def generate_and_broadcast_rounds(lobby_id: str, topic: str):
 async def submit_answer(
     lobby_id: str, message: dict, background_tasks: BackgroundTasks
 ):
-    rounds_key = f"lobby:{lobby_id}:round_data"
     subtopic_index = message["subtopicIndex"]
+    conn = lobby_conn(lobby_id)
 
-    # Fetch the round data from Redis as a serialized JSON string
-    round_data_json = await conn.get(rounds_key)
-    if not round_data_json:
-        raise HTTPException(status_code=404, detail="Round data not found")
+    await enforce_rate_limit(
+        "submit_answer", message.get("user_id") or message["playerName"], lobby_id
+    )
 
-    # Parse the JSON string to get the round data
-    round_data = json.loads(round_data_json)
+    subtopic = round_cache.get(lobby_id, subtopic_index)
+    if subtopic is None:
+        # Fetch only the subtopic being answered, along with the round version
+        # it belongs to so a concurrent regeneration can't be cached over
+        lobby_key = f"lobby:{lobby_id}"
+        async with conn.pipeline(transaction=True) as pipe:
+            pipe.hget(lobby_key, "round_version")
+            pipe.hget(f"{lobby_key}:round_subtopics", subtopic_index)
+            version, subtopic_json = await pipe.execute()
+        if not subtopic_json:
+            raise HTTPException(status_code=404, detail="Round data not found")
+
+        subtopic = json.loads(subtopic_json)
+        round_cache.put(lobby_id, int(version or 0), subtopic_index, subtopic)
+
+    # Submissions are only taken for the round the server is running, and
+    # close when it ends the round or the game; the answer is timed on the
+    # lobby's Redis clock, like the round
+    playing = await current_round(conn, lobby_id)
+    if playing is None:
+        raise HTTPException(status_code=409, detail="No round is being played")
+    if subtopic_index != playing.index or playing.now > playing.deadline:
+        raise HTTPException(status_code=409, detail="This round is closed")
+
+    # Answers must come in the lobby's answer mode; rounds without indexed
+    # sentences are shown as plain text, so they always take typed answers
+    if playing.answer_mode == "sentence" and subtopic.get("misinformation_sentences"):
+        sentence_index = message.get("sentenceIndex")
+        if (
+            not isinstance(sentence_index, int)
+            or isinstance(sentence_index, bool)
+            or not 0 <= sentence_index < len(subtopic["sentences"])
+        ):
+            raise HTTPException(status_code=400, detail="Invalid sentence index")
+
+        # One pick per player and round, so nobody can click through them all
+        user_id = message.get("user_id") or message["playerName"]
+        if not await claim_sentence_pick(conn, lobby_id, subtopic_index, user_id):
+            raise HTTPException(
+                status_code=409, detail="You already picked a sentence this round"
+            )
+    elif "sentenceIndex" in message or not isinstance(message.get("message"), str):
+        raise HTTPException(
+            status_code=400, detail="This round takes typed answers only"
+        )
 
     # Run answer evaluation in a background task
     background_tasks.add_task(
-        evaluate_answer, lobby_id, message, round_data, subtopic_index
+        evaluate_answer,
+        lobby_id,
+        message,
+        subtopic_index,
+        subtopic,
+        playing.now - playing.started_at,
     )
 
     return {"detail": "Answer received and being processed"}
 
 
 async def evaluate_answer(
-    lobby_id: str, message: dict, round_data: dict, subtopic_index: int
+    lobby_id: str,
+    message: dict,
+    subtopic_index: int,
+    subtopic: dict,
+    elapsed: float,
 ):
     """
-    Evaluates the player's answer using `grade_individual_answer`
-    and broadcasts the result via WebSocket.
+    Evaluates the player's answer using `grade_individual_answer`, or by
+    lookup if they picked a sentence, records the score, and broadcasts the
+    result via WebSocket.
     """
+    conn = lobby_conn(lobby_id)
     # Get the narrative and misinformation for the current subtopic
-    subtopic = round_data["subtopics"][subtopic_index]
     narrative = subtopic["narrative"]
     misinformation = subtopic["misinformation"]
 
-    # Grade the player's answer
-    player_answer = message["message"]
-    score = grade_individual_answer(player_answer, narrative, misinformation)
+    # Grade the player's answer, locally for a picked sentence or once the
+    # lobby is over its LLM budget
+    if "sentenceIndex" in message:
+        # Checked against the round's sentences by `submit_answer`
+        sentence_index = message["sentenceIndex"]
+        player_answer = subtopic["sentences"][sentence_index]
+        score = grade_sentence_pick(
+            sentence_index, subtopic["misinformation_sentences"]
+        )
+    elif await over_spend_cap(conn, lobby_id):
+        player_answer = message["message"]
+        score = heuristic_grade(player_answer, misinformation)
+    else:
+        player_answer = message["message"]
+        with lobby_usage(lobby_id) as ledger:
+            score = await asyncio.to_thread(
+                grade_individual_answer, player_answer, narrative, misinformation
+            )
+        await flush_usage(conn, primary_conn, ledger)
+
+    user_id = message.get("user_id") or message["playerName"]
 
     if score == 1:
+        awarded = await record_correct_answer(
+            conn, lobby_id, subtopic_index, user_id, elapsed
+        )
+        if awarded is None:
+            return  # Already scored this round
+
+        points, total_score = awarded
+        await bump_version(conn, lobby_id, SCOREBOARD_SECTION)
+        await end_round_if_everyone_scored(conn, lobby_id, subtopic_index)
+        await record_answer(
+            primary_conn,
+            user_id,
+            message["playerName"],
+            True,
+            elapsed,
+            points,
+            new_game=await mark_player_graded(conn, lobby_id, user_id),
+        )
+
         # Broadcast correct answer
         await conn.publish(
             f"channel:{lobby_id}",
@@ -474,10 +913,21 @@ async def evaluate_answer(
                 {
                     "type": "correct_guess",
                     "playerName": message["playerName"],
+                    "points": points,
+                    "totalScore": total_score,
                 }
             ),
         )
     else:
+        await record_answer(
+            primary_conn,
+            user_id,
+            message["playerName"],
+            False,
+            elapsed,
+            new_game=await mark_player_graded(conn, lobby_id, user_id),
+        )
+
         # Broadcast incorrect guess
         await conn.publish(
             f"channel:{lobby_id}",
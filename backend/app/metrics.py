@@ -0,0 +1,278 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Every metric registers itself here so /metrics can render them all
+REGISTRY: List["Metric"] = []
+
+# Upper bounds in seconds, from sub-millisecond Redis calls to slow LLM replies
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """
+    Base class for metrics, optionally split by labels.
+
+    Values are kept per worker process; LLM calls run in executor threads, so
+    updates take a lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing value.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, such as the number of open sockets.
+    """
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """
+        Count the wrapped block as in progress while it runs.
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed buckets.
+
+    An observation is a bisect and three additions, cheap enough to leave on
+    for every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Per label set: [count per bucket (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe how long the wrapped block takes, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            ]
+
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labelnames, key + (le,))} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def track_llm_call(kind: str) -> Iterator[None]:
+    """
+    Time an LLM call and count it as in flight while it runs.
+
+    Args:
+        kind (str): The prompt kind: subtopics, narrative, grade or flashcards.
+    """
+    with LLM_IN_FLIGHT.track(kind=kind), LLM_CALL_SECONDS.time(kind=kind):
+        yield
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Latency of REST handlers",
+    ("method", "route", "status"),
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Latency of Redis commands, with pipelines timed as a whole",
+    ("command",),
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of LLM calls per prompt kind",
+    ("kind",),
+)
+WEBSOCKET_SEND_SECONDS = Histogram(
+    "websocket_send_duration_seconds",
+    "Latency of sending one message to a WebSocket client",
+)
+
+OPEN_WEBSOCKETS = Gauge("websockets_open", "WebSocket connections currently open")
+SUBSCRIBED_CHANNELS = Gauge(
+    "pubsub_channels_subscribed", "Redis Pub/Sub channels this worker is subscribed to"
+)
+LLM_IN_FLIGHT = Gauge("llm_calls_in_flight", "LLM calls awaiting a reply", ("kind",))
+
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "LLM calls repeated because the reply did not match the expected schema",
+    ("kind",),
+)
+LLM_WASTED_TOKENS = Counter(
+    "llm_wasted_tokens_total",
+    "Tokens spent on LLM replies that were discarded",
+    ("kind",),
+)
+RATE_LIMITED = Counter(
+    "rate_limited_requests_total",
+    "Requests shed by the rate limiter",
+    ("route", "scope"),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens used by LLM calls per prompt template and model",
+    ("template", "model", "type"),
+)
+LLM_COST_USD = Counter(
+    "llm_cost_usd_total",
+    "Estimated LLM spend per prompt template and model",
+    ("template", "model"),
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Duplicate LLM requests fired because the first was slower than p95",
+    ("kind",),
+)
+LLM_DEADLINES_EXCEEDED = Counter(
+    "llm_deadlines_exceeded_total",
+    "LLM calls given up on at their deadline",
+    ("kind",),
+)
+LLM_PROVIDER_RETRIES = Counter(
+    "llm_provider_retries_total",
+    "LLM requests repeated after a transient provider error (e.g. a 429 or 5xx)",
+    ("kind",),
+)
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Results served by a fallback after an LLM call missed its deadline or failed",
+    ("kind", "fallback"),
+)
@@ -0,0 +1,270 @@
+"""
+Persistent bank of generated content, searchable by topic.
+
+Every generated subtopic (with its narrative and misinformation) and every
+flashcard is kept in a SQLite database with FTS5 full-text indexes, so new
+lobbies on related topics can reuse rounds instead of generating them all.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from app.logs import log_error
+from app.schemas import StudyQuestion, Subtopic
+
+# SQLite file of the bank; set it empty to turn the bank off
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "question_bank.db")
+
+# Share of a game's rounds that are always freshly generated; the rest may
+# come from the bank
+QUESTION_BANK_FRESHNESS = float(os.getenv("QUESTION_BANK_FRESHNESS", "0.6"))
+
+# Banked rounds are picked at random among this many times the rounds needed,
+# best matches first, so the same topic doesn't always replay the same rounds
+CANDIDATES_PER_ROUND = 3
+
+# A banked row matches a topic only if its topic and name (or question) hold
+# this share of the topic's search terms...
+MIN_TERM_SHARE = 0.6
+
+# ...and, unless it holds all of them, its bm25 relevance is at least this
+# strong. FTS5 scores better matches more negative; a word found all over
+# the bank scores near 0, which is also what every row of a bank holding a
+# single topic scores, hence the exemption for full matches.
+MIN_MATCH_SCORE = float(os.getenv("QUESTION_BANK_MIN_MATCH_SCORE", "1.0"))
+
+# Words left out of topic searches, as they'd match nearly everything
+TOPIC_STOPWORDS = {
+    "a",
+    "about",
+    "an",
+    "and",
+    "as",
+    "at",
+    "by",
+    "for",
+    "from",
+    "in",
+    "into",
+    "is",
+    "of",
+    "on",
+    "or",
+    "the",
+    "to",
+    "vs",
+    "with",
+}
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS subtopics USING fts5(
+    topic,
+    name,
+    narrative,
+    misinformation UNINDEXED,
+    sentences UNINDEXED,
+    misinformation_sentences UNINDEXED,
+    created_at UNINDEXED
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS flashcards USING fts5(
+    topic,
+    question,
+    options UNINDEXED,
+    correct_option_index UNINDEXED,
+    created_at UNINDEXED
+);
+"""
+
+_lock = threading.Lock()
+_db: Optional[sqlite3.Connection] = None
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """
+    The bank's connection, opened on first use; None if the bank is off or
+    SQLite lacks FTS5.
+    """
+    global _db
+    if _db is None and QUESTION_BANK_PATH:
+        try:
+            db = sqlite3.connect(QUESTION_BANK_PATH, check_same_thread=False)
+            db.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            log_error("question_bank_unavailable", e, path=QUESTION_BANK_PATH)
+            return None
+        _db = db
+    return _db
+
+
+def topic_terms(text: str) -> List[str]:
+    """
+    The distinct search terms of a topic, e.g. "The Cold War" -> ["cold", "war"].
+    """
+    words = dict.fromkeys(re.findall(r"\w+", text.lower()))
+    return [word for word in words if word not in TOPIC_STOPWORDS]
+
+
+def match_query(terms: List[str]) -> str:
+    """
+    FTS5 query matching any of the terms, e.g. '"cold" OR "war"'; rows are
+    then held to `matches_topic`.
+    """
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def matches_topic(terms: List[str], text: str, rank: float) -> bool:
+    """
+    Whether a banked row found by `match_query` is close enough to reuse:
+    all of the topic's terms appear in `text`, or most of them do and bm25
+    `rank` is strong.
+    """
+    found = len(set(terms) & set(topic_terms(text)))
+    if found == len(terms):
+        return True
+    return found >= math.ceil(len(terms) * MIN_TERM_SHARE) and -rank >= MIN_MATCH_SCORE
+
+
+def banked_rounds(rounds: int, freshness: float = QUESTION_BANK_FRESHNESS) -> int:
+    """
+    How many of a game's rounds may come from the bank.
+    """
+    fresh = math.ceil(rounds * min(max(freshness, 0.0), 1.0))
+    return rounds - fresh
+
+
+def _insert(table: str, rows: List[tuple]) -> None:
+    """
+    Add rows to a bank table. SQLite errors (e.g. "database is locked" with
+    several workers writing) are logged rather than raised, so the content
+    being saved still reaches the game.
+    """
+    with _lock:
+        db = _connect()
+        if db is None:
+            return
+        placeholders = ", ".join("?" * len(rows[0]))
+        try:
+            with db:
+                db.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        except sqlite3.Error as e:
+            log_error("question_bank_write_failed", e, table=table, rows=len(rows))
+
+
+def _search(table: str, sql: str, params: tuple) -> List[tuple]:
+    """
+    Run a search on a bank table; SQLite errors are logged and find nothing.
+    """
+    with _lock:
+        db = _connect()
+        if db is None:
+            return []
+        try:
+            return db.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            log_error("question_bank_search_failed", e, table=table)
+            return []
+
+
+def save_subtopics(topic: str, subtopics: List[Subtopic]) -> None:
+    if not subtopics:
+        return
+    now = time.time()
+    _insert(
+        "subtopics",
+        [
+            (
+                topic,
+                subtopic.name,
+                subtopic.narrative,
+                subtopic.misinformation,
+                json.dumps(subtopic.sentences),
+                json.dumps(subtopic.misinformation_sentences),
+                now,
+            )
+            for subtopic in subtopics
+        ],
+    )
+
+
+def save_flashcards(topic: str, questions: List[StudyQuestion]) -> None:
+    if not questions:
+        return
+    now = time.time()
+    _insert(
+        "flashcards",
+        [
+            (
+                topic,
+                question.question,
+                json.dumps(question.options),
+                question.correct_option_index,
+                now,
+            )
+            for question in questions
+        ],
+    )
+
+
+def find_subtopics(topic: str, limit: int) -> List[Subtopic]:
+    """
+    Up to `limit` banked subtopics closely matching a topic, with distinct
+    names.
+
+    Args:
+        topic (str): The topic of the new game.
+        limit (int): The most subtopics to return.
+
+    Returns:
+        List[Subtopic]: Randomly chosen among the best matches.
+    """
+    terms = topic_terms(topic)
+    if limit <= 0 or not terms:
+        return []
+
+    # Match on the topic and subtopic name, the topic counting double
+    rows = _search(
+        "subtopics",
+        """
+        SELECT topic, name, narrative, misinformation, sentences,
+            misinformation_sentences, bm25(subtopics, 2.0, 1.0) AS rank
+        FROM subtopics
+        WHERE subtopics MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (f"{{topic name}}: ({match_query(terms)})", limit * CANDIDATES_PER_ROUND * 2),
+    )
+
+    candidates = {}
+    for (
+        banked_topic,
+        name,
+        narrative,
+        misinformation,
+        sentences,
+        misinformation_sentences,
+        rank,
+    ) in rows:
+        if name.lower() in candidates:
+            continue
+        if not matches_topic(terms, f"{banked_topic} {name}", rank):
+            continue
+        candidates[name.lower()] = Subtopic(
+            name=name,
+            narrative=narrative,
+            misinformation=misinformation,
+            sentences=json.loads(sentences),
+            misinformation_sentences=json.loads(misinformation_sentences),
+        )
+        if len(candidates) == limit * CANDIDATES_PER_ROUND:
+            break
+
+    candidates = list(candidates.values())
+    return random.sample(candidates, min(limit, len(candidates)))
@@ -0,0 +1,113 @@
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.metrics import RATE_LIMITED
+
+# Refills and takes from every bucket in KEYS at once: either all of them have
+# enough tokens and are charged, or none are. Time comes from the Redis server
+# so workers with skewed clocks share one view of each bucket.
+#
+# KEYS: bucket hashes; ARGV[1]: cost, then (rate per second, burst) per key
+# Returns {1, 0, 0} if allowed, else {0, retry after in ms, 1-based key index}
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local levels = {}
+local retry_after = 0
+local denied_by = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+    levels[i] = tokens
+    if tokens < cost then
+        local wait = math.ceil((cost - tokens) * 1000 / rate)
+        if wait > retry_after then
+            retry_after = wait
+            denied_by = i
+        end
+    end
+end
+if denied_by > 0 then
+    return {0, retry_after, denied_by}
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000)
+end
+return {1, 0, 0}
+"""
+
+
+class Limit(NamedTuple):
+    rate: float  # Tokens added per second
+    burst: float  # Bucket capacity
+
+
+def _limit_from_env(route: str, scope: str, default: Limit) -> Limit:
+    """
+    Read an override such as RATE_LIMIT_SUBMIT_ANSWER_USER="0.5/3" (rate/burst).
+    """
+    value = os.getenv(f"RATE_LIMIT_{route.upper()}_{scope.upper()}")
+    if not value:
+        return default
+    rate, burst = value.split("/")
+    return Limit(float(rate), float(burst))
+
+
+_DEFAULT_LIMITS: Dict[str, Dict[str, Limit]] = {
+    # Every answer costs an LLM call
+    "submit_answer": {"user": Limit(1, 5), "lobby": Limit(10, 40)},
+    # Every chat message fans out to the whole lobby
+    "chat": {"user": Limit(2, 10), "lobby": Limit(20, 60)},
+}
+
+RATE_LIMITS: Dict[str, Dict[str, Limit]] = {
+    route: {
+        scope: _limit_from_env(route, scope, limit) for scope, limit in scopes.items()
+    }
+    for route, scopes in _DEFAULT_LIMITS.items()
+}
+
+
+async def check_rate_limit(
+    conn, route: str, user_key: str, lobby_id: str, cost: float = 1
+) -> Optional[Tuple[str, float]]:
+    """
+    Take `cost` tokens from the user's and the lobby's buckets for a route.
+
+    Args:
+        conn: The Redis connection holding the buckets.
+        route (str): A key of `RATE_LIMITS`.
+        user_key (str): Identifies the caller, usually their user ID.
+        lobby_id (str): The lobby the request targets.
+        cost (float): Tokens the request consumes.
+
+    Returns:
+        Optional[Tuple[str, float]]: None if the request is admitted, otherwise
+        the scope that refused it and the seconds until it would be admitted.
+    """
+    limits = RATE_LIMITS[route]
+    scopes = [("user", user_key), ("lobby", lobby_id)]
+
+    args = [cost]
+    for scope, _ in scopes:
+        args.extend(limits[scope])
+
+    script = conn.register_script(TOKEN_BUCKET_SCRIPT)
+    allowed, retry_after_ms, denied_by = await script(
+        keys=[f"ratelimit:{route}:{scope}:{key}" for scope, key in scopes],
+        args=args,
+    )
+    if allowed:
+        return None
+
+    scope = scopes[int(denied_by) - 1][0]
+    RATE_LIMITED.inc(route=route, scope=scope)
+    return scope, int(retry_after_ms) / 1000
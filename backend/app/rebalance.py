@@ -0,0 +1,138 @@
+"""
+Move lobbies to the Redis node that owns them after REDIS_NODES changes.
+
+Usage:
+    python -m app.rebalance --old redis://a:6379,redis://b:6379 \\
+        --new redis://a:6379,redis://b:6379,redis://c:6379 [--dry-run]
+
+Every `lobby:{id}` key and its `lobby:{id}:*` keys are copied with their TTLs
+to the lobby's new node and then deleted from the old one, and a running
+round's entry in the node's round deadlines moves with them. Players connected
+to a moved lobby are subscribed on the old node, so run this before deploying
+the new node list and expect those clients to reconnect.
+
+Keys outside lobbies (leaderboards, user stats, LLM usage) live on the first
+node and are not moved, so the first node must stay first; the tool refuses
+node lists that change it.
+"""
+
+import argparse
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import redis
+from app.round_timer import ROUND_DEADLINES_KEY
+from app.sharding import HashRing, node_name
+
+LOBBY_KEY_REGEX = re.compile(r"^lobby:([a-f0-9]{32})(?::|$)")
+
+SCAN_BATCH = 1000
+
+
+def lobby_keys(client: redis.Redis) -> Dict[str, List[bytes]]:
+    """
+    Group every lobby key on a node by lobby ID.
+    """
+    keys = defaultdict(list)
+    for key in client.scan_iter(match="lobby:*", count=SCAN_BATCH):
+        match = LOBBY_KEY_REGEX.match(key.decode())
+        if match:
+            keys[match.group(1)].append(key)
+    return keys
+
+
+def move_keys(source: redis.Redis, target: redis.Redis, keys: List[bytes]) -> None:
+    """
+    Copy keys to another node with their TTLs, then delete them from the source.
+    """
+    with source.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+        dumped = pipe.execute()
+
+    with target.pipeline(transaction=False) as pipe:
+        for key, value, ttl in zip(keys, dumped[::2], dumped[1::2]):
+            if value is None:
+                continue  # Expired since the scan
+            pipe.restore(key, max(ttl, 0), value, replace=True)
+        pipe.execute()
+
+    source.delete(*keys)
+
+
+def take_round_deadline(client: redis.Redis, lobby_id: str) -> Optional[float]:
+    """
+    Remove a lobby's round deadline from a node, so its scheduler stops timing
+    the lobby, and return it; None if no round is running.
+    """
+    with client.pipeline(transaction=True) as pipe:
+        pipe.zscore(ROUND_DEADLINES_KEY, lobby_id)
+        pipe.zrem(ROUND_DEADLINES_KEY, lobby_id)
+        deadline, _ = pipe.execute()
+    return deadline
+
+
+def rebalance(old_urls: List[str], new_urls: List[str], dry_run: bool = False) -> int:
+    """
+    Move every lobby whose owner differs between the old and new node lists.
+
+    Returns:
+        int: The number of lobbies moved (or that would be moved on a dry run).
+
+    Raises:
+        ValueError: If the first node, which holds the keys outside lobbies,
+            isn't the same in both lists.
+    """
+    if node_name(old_urls[0]) != node_name(new_urls[0]):
+        raise ValueError(
+            "The first node holds the leaderboards, user stats and LLM usage, "
+            f"which aren't moved; keep {old_urls[0]} first in the new node list"
+        )
+
+    old_ring = HashRing(old_urls)
+    new_ring = HashRing(new_urls)
+    clients = {url: redis.Redis.from_url(url) for url in set(old_urls + new_urls)}
+
+    moved = 0
+    for url in old_urls:
+        for lobby_id, keys in lobby_keys(clients[url]).items():
+            # Only touch lobbies actually owned by this node under the old ring
+            if old_ring.url_for(lobby_id) != url:
+                continue
+            target_url = new_ring.url_for(lobby_id)
+            if target_url == url:
+                continue
+
+            moved += 1
+            print(f"{lobby_id}: {url} -> {target_url} ({len(keys)} keys)")
+            if not dry_run:
+                # The deadline leaves the old node first, so its scheduler
+                # can't end the round while the keys are moving
+                deadline = take_round_deadline(clients[url], lobby_id)
+                move_keys(clients[url], clients[target_url], keys)
+                if deadline is not None:
+                    clients[target_url].zadd(ROUND_DEADLINES_KEY, {lobby_id: deadline})
+
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--old", required=True, help="Current REDIS_NODES")
+    parser.add_argument("--new", required=True, help="REDIS_NODES after the change")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only list the lobbies that would move"
+    )
+    args = parser.parse_args()
+
+    try:
+        moved = rebalance(args.old.split(","), args.new.split(","), args.dry_run)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{'Would move' if args.dry_run else 'Moved'} {moved} lobbies")
+
+
+if __name__ == "__main__":
+    main()
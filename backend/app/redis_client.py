@@ -0,0 +1,40 @@
+import time
+
+import redis.asyncio as redis
+from app.metrics import REDIS_COMMAND_SECONDS
+from redis.asyncio.client import Pipeline
+
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Pipeline that records the latency of each round-trip it makes.
+    """
+
+    async def execute(self, raise_on_error: bool = True):
+        command = "multi" if self.is_transaction else "pipeline"
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.observe(time.perf_counter() - start, command=command)
+
+
+class InstrumentedRedis(redis.Redis):
+    """
+    Redis client that records the latency of every command in
+    `redis_command_duration_seconds`.
+    """
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.observe(
+                time.perf_counter() - start, command=str(args[0]).lower()
+            )
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
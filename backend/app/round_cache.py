@@ -0,0 +1,79 @@
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Workers listen on this channel so every process drops its cached copy of a
+# lobby's rounds as soon as they are regenerated.
+ROUNDS_INVALIDATION_CHANNEL = "rounds:invalidate"
+
+ROUND_CACHE_MAX_LOBBIES = int(os.getenv("ROUND_CACHE_MAX_LOBBIES", "1024"))
+
+
+class RoundDataCache:
+    """
+    Per-worker LRU cache of parsed subtopics, keyed by lobby and round version.
+
+    Each lobby entry holds the round version it was filled from and the
+    subtopics looked up so far. Invalidating with a newer version leaves an
+    empty entry behind, so a lookup that raced the regeneration can never
+    put the older data back.
+    """
+
+    def __init__(self, max_lobbies: int = ROUND_CACHE_MAX_LOBBIES):
+        self.max_lobbies = max_lobbies
+        self._entries: "OrderedDict[str, Tuple[int, Dict[int, dict]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, lobby_id: str, subtopic_index: int) -> Optional[dict]:
+        """
+        Return the cached subtopic, or None if it has not been fetched yet.
+        """
+        entry = self._entries.get(lobby_id)
+        if entry is None:
+            return None
+        self._entries.move_to_end(lobby_id)
+        return entry[1].get(subtopic_index)
+
+    def put(
+        self, lobby_id: str, version: int, subtopic_index: int, subtopic: dict
+    ) -> None:
+        """
+        Store a subtopic read from Redis at the given round version.
+        """
+        entry = self._entries.get(lobby_id)
+        if entry is not None and entry[0] > version:
+            return  # The rounds were regenerated while this lookup was in flight
+        if entry is None or entry[0] < version:
+            entry = (version, {})
+            self._entries[lobby_id] = entry
+
+        entry[1][subtopic_index] = subtopic
+        self._entries.move_to_end(lobby_id)
+
+        while len(self._entries) > self.max_lobbies:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, lobby_id: str, version: Optional[int] = None) -> None:
+        """
+        Drop the subtopics cached for a lobby.
+
+        Args:
+            lobby_id (str): The lobby whose rounds changed.
+            version (Optional[int]): The new round version. Entries at this
+                version or later are kept; None drops the entry outright.
+        """
+        if version is None:
+            self._entries.pop(lobby_id, None)
+            return
+
+        entry = self._entries.get(lobby_id)
+        if entry is None or entry[0] < version:
+            self._entries[lobby_id] = (version, {})
+            self._entries.move_to_end(lobby_id)
+            while len(self._entries) > self.max_lobbies:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
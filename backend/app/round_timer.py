@@ -0,0 +1,249 @@
+"""
+Server-driven round timing.
+
+Each Redis node keeps one sorted set of the lobbies it holds that have a
+round running, scored by the round's deadline. Every worker runs a single
+scheduler loop that, once per tick, pops the due lobbies off each node and
+moves them to their next round; the Lua scripts make sure only one worker
+acts on a given deadline. The cost per tick depends on the number of rounds
+ending, not on the number of rounds running.
+"""
+
+import asyncio
+import json
+import os
+from typing import NamedTuple, Optional
+
+from app.logs import log_error
+from app.scoring import ROUND_DURATION_SECONDS, round_scores_key
+from app.session import FINISHED_PHASE, GAME_PHASE, transition_phase
+from app.snapshot import PHASE_SECTION, ROUNDS_SECTION, bump_version
+
+# How often each worker looks for rounds past their deadline
+ROUND_TICK_SECONDS = float(os.getenv("ROUND_TICK_SECONDS", "0.25"))
+
+# Sorted set, on every node, of lobby IDs scored by their round deadline
+ROUND_DEADLINES_KEY = "round_deadlines"
+
+# Most rounds ended per node and tick; the rest wait for the next tick
+DUE_BATCH = 500
+
+# Round times come from the clock of the Redis node holding the lobby, so
+# workers with skewed clocks agree on when a round started and ends.
+#
+# KEYS[1]: lobby hash, KEYS[2]: deadlines set
+# ARGV[1]: lobby ID, ARGV[2]: round duration, ARGV[3]: rounds
+# Returns the start time and deadline of the first round
+START_ROUNDS_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local deadline = now + tonumber(ARGV[2])
+redis.call('HSET', KEYS[1], 'current_round', 0, 'round_count', ARGV[3],
+    'round_started_at', tostring(now), 'round_deadline', tostring(deadline))
+redis.call('ZADD', KEYS[2], deadline, ARGV[1])
+return {tostring(now), tostring(deadline)}
+"""
+
+# Ends the lobby's current round if its deadline has passed and starts the
+# next one. Returns nil if another worker got there first or the lobby is
+# gone from this node, else the ended round and the started one (-1 once the
+# game is over), followed by the started round's start time and deadline.
+#
+# KEYS[1]: lobby hash, KEYS[2]: deadlines set
+# ARGV[1]: lobby ID, ARGV[2]: round duration
+ADVANCE_ROUND_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local deadline = redis.call('ZSCORE', KEYS[2], ARGV[1])
+if not deadline or tonumber(deadline) > now then
+    return nil
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    return nil
+end
+local ended = tonumber(redis.call('HGET', KEYS[1], 'current_round') or '-1')
+local count = tonumber(redis.call('HGET', KEYS[1], 'round_count') or '0')
+if ended + 1 >= count then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('HDEL', KEYS[1], 'current_round')
+    return {ended, -1}
+end
+local next_deadline = now + tonumber(ARGV[2])
+redis.call('HSET', KEYS[1], 'current_round', ended + 1,
+    'round_started_at', tostring(now), 'round_deadline', tostring(next_deadline))
+redis.call('ZADD', KEYS[2], next_deadline, ARGV[1])
+return {ended, ended + 1, tostring(now), tostring(next_deadline)}
+"""
+
+# Brings the deadline of a round forward to now, if it is still running.
+#
+# KEYS[1]: lobby hash, KEYS[2]: deadlines set
+# ARGV[1]: lobby ID, ARGV[2]: round
+END_ROUND_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'current_round') ~= ARGV[2] then
+    return 0
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+redis.call('HSET', KEYS[1], 'round_deadline', tostring(now))
+return redis.call('ZADD', KEYS[2], 'XX', 'CH', now, ARGV[1])
+"""
+
+
+class PlayingRound(NamedTuple):
+    """
+    The round a lobby is playing, as seen at `now` on its Redis node's clock.
+    """
+
+    index: int
+    started_at: float
+    deadline: float
+    # The lobby's answer mode, read along so an answer costs one lookup
+    answer_mode: str
+    now: float
+
+
+async def redis_time(conn) -> float:
+    """
+    The current time on a Redis node's clock, in seconds.
+    """
+    seconds, microseconds = await conn.time()
+    return seconds + microseconds / 1_000_000
+
+
+async def start_rounds(conn, lobby_id: str, round_count: int) -> None:
+    """
+    Start the first round of a lobby's freshly generated rounds and announce it.
+    """
+    script = conn.register_script(START_ROUNDS_SCRIPT)
+    started_at, deadline = await script(
+        keys=[f"lobby:{lobby_id}", ROUND_DEADLINES_KEY],
+        args=[lobby_id, ROUND_DURATION_SECONDS, round_count],
+    )
+    await bump_version(conn, lobby_id, ROUNDS_SECTION)
+    await conn.publish(
+        f"channel:{lobby_id}",
+        json.dumps(
+            {
+                "type": "round_started",
+                "subtopicIndex": 0,
+                "startedAt": float(started_at),
+                "deadline": float(deadline),
+            }
+        ),
+    )
+
+
+async def current_round(conn, lobby_id: str) -> Optional[PlayingRound]:
+    """
+    The round a lobby is playing, or None if the game isn't on or the server
+    isn't timing any round for it.
+    """
+    async with conn.pipeline(transaction=True) as pipe:
+        pipe.hmget(
+            f"lobby:{lobby_id}",
+            "phase",
+            "current_round",
+            "round_started_at",
+            "round_deadline",
+            "answer_mode",
+        )
+        pipe.time()
+        fields, (seconds, microseconds) = await pipe.execute()
+
+    phase, index, started_at, deadline, answer_mode = fields
+    if phase != GAME_PHASE or index is None:
+        return None
+    return PlayingRound(
+        index=int(index),
+        started_at=float(started_at),
+        deadline=float(deadline),
+        answer_mode=answer_mode or "text",
+        now=seconds + microseconds / 1_000_000,
+    )
+
+
+async def end_round_if_everyone_scored(conn, lobby_id: str, subtopic_index: int):
+    """
+    End a round at the next tick once every participant has answered it correctly.
+    """
+    async with conn.pipeline(transaction=False) as pipe:
+        pipe.zcard(round_scores_key(lobby_id, subtopic_index))
+        pipe.scard(f"lobby:{lobby_id}:participants")
+        scored, participants = await pipe.execute()
+    if scored < participants:
+        return
+
+    script = conn.register_script(END_ROUND_SCRIPT)
+    await script(
+        keys=[f"lobby:{lobby_id}", ROUND_DEADLINES_KEY],
+        args=[lobby_id, subtopic_index],
+    )
+
+
+async def advance_due_rounds(conn) -> int:
+    """
+    End every round on a node whose deadline has passed, and start the next.
+
+    Returns:
+        int: The number of rounds this worker ended.
+    """
+    now = await redis_time(conn)
+    due = await conn.zrangebyscore(
+        ROUND_DEADLINES_KEY, "-inf", now, start=0, num=DUE_BATCH
+    )
+    if not due:
+        return 0
+
+    script = conn.register_script(ADVANCE_ROUND_SCRIPT)
+    ended_rounds = 0
+    for lobby_id in due:
+        advanced = await script(
+            keys=[f"lobby:{lobby_id}", ROUND_DEADLINES_KEY],
+            args=[lobby_id, ROUND_DURATION_SECONDS],
+        )
+        if advanced is None:
+            continue  # Ended by another worker, or the lobby is gone
+
+        ended, started, *started_times = advanced
+        ended_rounds += 1
+        await bump_version(conn, lobby_id, ROUNDS_SECTION)
+        channel = f"channel:{lobby_id}"
+        await conn.publish(
+            channel, json.dumps({"type": "round_ended", "subtopicIndex": ended})
+        )
+        if started >= 0:
+            started_at, deadline = started_times
+            await conn.publish(
+                channel,
+                json.dumps(
+                    {
+                        "type": "round_started",
+                        "subtopicIndex": started,
+                        "startedAt": float(started_at),
+                        "deadline": float(deadline),
+                    }
+                ),
+            )
+        else:
+            if await transition_phase(conn, lobby_id, GAME_PHASE, FINISHED_PHASE):
+                await bump_version(conn, lobby_id, PHASE_SECTION)
+            await conn.publish(channel, json.dumps({"type": "game_over"}))
+
+    return ended_rounds
+
+
+async def run_round_scheduler(router) -> None:
+    """
+    The worker's scheduler loop: one pass over every Redis node per tick.
+    """
+    while True:
+        for conn in router.clients.values():
+            try:
+                await advance_due_rounds(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_error("round_scheduler_failed", e)
+        await asyncio.sleep(ROUND_TICK_SECONDS)
@@ -1,7 +1,7 @@
 import re
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class StudyQuestion(BaseModel):
@@ -56,11 +56,42 @@ class StudyQuestionResponse(BaseModel):
     study_narrative: Optional[StudyNarrative] = None
 
 
+# Subtopic fields that give a round's answer away; never sent to players
+ANSWER_FIELDS = {"misinformation", "misinformation_sentences"}
+
+
 class Subtopic(BaseModel):
     name: str
     narrative: str
     misinformation: str
+    # The narrative split into sentences, and which of them are misinformation
+    sentences: List[str] = []
+    misinformation_sentences: List[int] = []
 
 
 class Rounds(BaseModel):
     subtopics: list[Subtopic]
+
+    def public_dump(self) -> dict:
+        """The rounds as sent to players, without their answers."""
+        return self.model_dump(exclude={"subtopics": {"__all__": ANSWER_FIELDS}})
+
+
+class GeneratedSubtopics(BaseModel):
+    """Structured LLM reply listing the subtopics of a topic."""
+
+    subtopics: List[str] = Field(
+        description="Subcategories of the main topic, one short title each",
+        min_length=5,
+    )
+
+
+class GeneratedNarrative(BaseModel):
+    """Structured LLM reply holding a narrative and its planted mistake."""
+
+    narrative: str = Field(
+        description="The narrative explaining the topic, including the incorrect statement"
+    )
+    incorrect_statement: str = Field(
+        description="The incorrect statement, exactly as it appears in the narrative"
+    )
@@ -0,0 +1,153 @@
+import os
+from typing import List, Optional, Tuple
+
+# Length of each subtopic round, timed by the server's round timer
+ROUND_DURATION_SECONDS = float(os.getenv("ROUND_DURATION_SECONDS", "60"))
+
+# Weight of the response-time bonus, as in `adjust_scores_based_on_time`
+TIME_WEIGHT = 0.2
+
+SCORES_TTL_SECONDS = 24 * 60 * 60
+
+
+def lobby_scores_key(lobby_id: str) -> str:
+    return f"lobby:{lobby_id}:scores"
+
+
+def round_scores_key(lobby_id: str, subtopic_index: int) -> str:
+    return f"lobby:{lobby_id}:round:{subtopic_index}:scores"
+
+
+# Credits a correct answer to a participant who hasn't scored the round yet:
+# the round set records who already scored (so nobody is credited twice) and
+# the lobby set keeps the running totals, both updated together.
+#
+# KEYS[1]: participants set, KEYS[2]: round scores, KEYS[3]: lobby scores
+# ARGV[1]: user ID, ARGV[2]: points, ARGV[3]: TTL in seconds
+RECORD_CORRECT_ANSWER_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 0 then
+    return nil
+end
+if redis.call('ZADD', KEYS[2], 'NX', ARGV[2], ARGV[1]) == 0 then
+    return nil
+end
+local total = redis.call('ZINCRBY', KEYS[3], ARGV[2], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+return total
+"""
+
+
+def time_bonus(
+    elapsed: float,
+    duration: float = ROUND_DURATION_SECONDS,
+    time_weight: float = TIME_WEIGHT,
+) -> float:
+    """
+    Bonus for a correct answer given `elapsed` seconds after the round started.
+
+    Mirrors the normalization in `adjust_scores_based_on_time`, but against the
+    round window instead of the fastest and slowest answers, so it can be
+    computed as soon as a single answer is graded.
+
+    Args:
+        elapsed (float): Seconds between the round start and the answer.
+        duration (float): Length of the round in seconds.
+        time_weight (float): Bonus awarded for an instant answer.
+
+    Returns:
+        float: A bonus between 0 and `time_weight`.
+    """
+    normalized_time = min(max((duration - elapsed) / duration, 0.0), 1.0)
+    return normalized_time * time_weight
+
+
+async def record_correct_answer(
+    conn, lobby_id: str, subtopic_index: int, user_id: str, elapsed: float
+) -> Optional[Tuple[float, float]]:
+    """
+    Award points for a correct answer to a subtopic round.
+
+    Args:
+        conn: The Redis connection holding the lobby.
+        lobby_id (str): The lobby the answer was submitted to.
+        subtopic_index (int): The round being answered.
+        user_id (str): The player who answered.
+        elapsed (float): Seconds between the round start and the answer.
+
+    Returns:
+        Optional[Tuple[float, float]]: The points awarded and the player's new
+        lobby total, or None if the player isn't in the lobby or had already
+        scored this round.
+    """
+    points = 1 + time_bonus(elapsed)
+
+    script = conn.register_script(RECORD_CORRECT_ANSWER_SCRIPT)
+    total = await script(
+        keys=[
+            f"lobby:{lobby_id}:participants",
+            round_scores_key(lobby_id, subtopic_index),
+            lobby_scores_key(lobby_id),
+        ],
+        args=[user_id, points, SCORES_TTL_SECONDS],
+    )
+    if total is None:
+        return None
+
+    return points, float(total)
+
+
+async def mark_player_graded(conn, lobby_id: str, user_id: str) -> bool:
+    """
+    Record that a player has had an answer graded in a lobby.
+
+    Returns:
+        bool: True the first time for a given player, which counts as a game played.
+    """
+    graded_key = f"lobby:{lobby_id}:graded_users"
+    if not await conn.sadd(graded_key, user_id):
+        return False
+    await conn.expire(graded_key, SCORES_TTL_SECONDS)
+    return True
+
+
+async def claim_sentence_pick(
+    conn, lobby_id: str, subtopic_index: int, user_id: str
+) -> bool:
+    """
+    Record a player's sentence pick for a round; each player gets one.
+
+    Returns:
+        bool: True for the player's first pick of the round, False after that.
+    """
+    picks_key = f"lobby:{lobby_id}:round:{subtopic_index}:picks"
+    if not await conn.sadd(picks_key, user_id):
+        return False
+    await conn.expire(picks_key, SCORES_TTL_SECONDS)
+    return True
+
+
+async def top_scores(
+    conn, lobby_id: str, k: int = 10, subtopic_index: Optional[int] = None
+) -> List[Tuple[str, str, float]]:
+    """
+    Top `k` players of a lobby, or of a single round if `subtopic_index` is given.
+
+    Returns:
+        List[Tuple[str, str, float]]: (user_id, player_name, score) by descending score.
+    """
+    key = (
+        lobby_scores_key(lobby_id)
+        if subtopic_index is None
+        else round_scores_key(lobby_id, subtopic_index)
+    )
+    ranking = await conn.zrevrange(key, 0, k - 1, withscores=True)
+    if not ranking:
+        return []
+
+    user_ids = [user_id for user_id, _ in ranking]
+    names = await conn.hmget(f"lobby:{lobby_id}:players", user_ids)
+    return [
+        (user_id, name if name else "Unknown Player", score)
+        for (user_id, score), name in zip(ranking, names)
+    ]
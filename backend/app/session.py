@@ -0,0 +1,54 @@
+from typing import Dict, Tuple
+
+# Phases a lobby goes through, all served over the same session socket
+LOBBY_PHASE = "lobby"
+GAME_PHASE = "in_game"
+FINISHED_PHASE = "finished"
+
+# Allowed phase changes; anything else is refused
+PHASE_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    LOBBY_PHASE: (GAME_PHASE,),
+    GAME_PHASE: (FINISHED_PHASE,),
+    FINISHED_PHASE: (),
+}
+
+# Compare-and-set of the phase, so two hosts' tabs or a retried request
+# can't both start the game.
+#
+# KEYS[1]: lobby hash; ARGV[1]: expected phase, ARGV[2]: new phase,
+# ARGV[3]: phase of lobbies that predate the field
+TRANSITION_SCRIPT = """
+local phase = redis.call('HGET', KEYS[1], 'phase') or ARGV[3]
+if phase ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'phase', ARGV[2])
+return 1
+"""
+
+
+async def get_phase(conn, lobby_id: str) -> str:
+    return await conn.hget(f"lobby:{lobby_id}", "phase") or LOBBY_PHASE
+
+
+async def transition_phase(conn, lobby_id: str, from_phase: str, to_phase: str) -> bool:
+    """
+    Move a lobby from one phase to the next.
+
+    Args:
+        conn: The Redis connection holding the lobby.
+        lobby_id (str): The lobby to move.
+        from_phase (str): The phase the lobby must currently be in.
+        to_phase (str): The phase to move it to.
+
+    Returns:
+        bool: True if the lobby moved, False if it was not in `from_phase`.
+    """
+    if to_phase not in PHASE_TRANSITIONS[from_phase]:
+        raise ValueError(f"Cannot move a lobby from {from_phase} to {to_phase}")
+
+    script = conn.register_script(TRANSITION_SCRIPT)
+    moved = await script(
+        keys=[f"lobby:{lobby_id}"], args=[from_phase, to_phase, LOBBY_PHASE]
+    )
+    return bool(moved)
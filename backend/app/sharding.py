@@ -0,0 +1,87 @@
+import bisect
+import hashlib
+import os
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from app.redis_client import InstrumentedRedis
+
+# Comma-separated Redis URLs that lobbies are spread over; defaults to REDIS_URL.
+# The first also holds the keys outside lobbies, so it must stay first when
+# nodes are added (see app.rebalance)
+REDIS_NODES = [
+    url.strip()
+    for url in os.getenv(
+        "REDIS_NODES", os.environ.get("REDIS_URL", "redis://redis")
+    ).split(",")
+    if url.strip()
+]
+
+# Points per node on the ring; more points give a more even spread
+VIRTUAL_NODES = 160
+
+
+def node_name(url: str) -> str:
+    """
+    Identity of a node on the ring, without credentials, so rotating a
+    password doesn't move any lobby.
+    """
+    parsed = urlparse(url)
+    db = parsed.path.lstrip("/") or "0"
+    return f"{parsed.hostname}:{parsed.port or 6379}/{db}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring mapping lobby IDs to node URLs.
+
+    Adding a node only moves the lobbies that land on its points, roughly
+    1/N of them, instead of reshuffling every lobby.
+    """
+
+    def __init__(self, urls: List[str], virtual_nodes: int = VIRTUAL_NODES):
+        if not urls:
+            raise ValueError("At least one Redis node is required")
+        self.urls = list(urls)
+        points = sorted(
+            (_hash(f"{node_name(url)}#{index}"), url)
+            for url in self.urls
+            for index in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._urls = [url for _, url in points]
+
+    def url_for(self, lobby_id: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(lobby_id)) % len(self._hashes)
+        return self._urls[index]
+
+
+class RedisRouter:
+    """
+    One Redis client per node, with every key of a lobby (and its Pub/Sub
+    channel) routed to the node that owns the lobby ID.
+
+    Keys that don't belong to a lobby (leaderboards, user stats, global
+    counters, the round invalidation channel) live on the first node.
+    """
+
+    def __init__(self, urls: List[str] = REDIS_NODES):
+        self.ring = HashRing(urls)
+        self.clients: Dict[str, InstrumentedRedis] = {
+            url: InstrumentedRedis.from_url(url, decode_responses=True) for url in urls
+        }
+        self.primary = self.clients[urls[0]]
+
+    def url_for(self, lobby_id: str) -> str:
+        return self.ring.url_for(lobby_id)
+
+    def for_lobby(self, lobby_id: str) -> InstrumentedRedis:
+        return self.clients[self.ring.url_for(lobby_id)]
+
+    async def close(self) -> None:
+        for client in self.clients.values():
+            await client.close()
@@ -0,0 +1,158 @@
+from typing import Dict, Optional, Tuple
+
+from app.schemas import Rounds, Subtopic
+from app.scoring import lobby_scores_key
+from app.session import LOBBY_PHASE
+
+# Parts of a lobby's state a snapshot is made of; each records the lobby
+# version it last changed at, so a client can fetch only what changed
+LOBBY_SECTION = "lobby"
+PLAYERS_SECTION = "players"
+PHASE_SECTION = "phase"
+ROUNDS_SECTION = "rounds"
+SCOREBOARD_SECTION = "scoreboard"
+
+SECTIONS = (
+    LOBBY_SECTION,
+    PLAYERS_SECTION,
+    PHASE_SECTION,
+    ROUNDS_SECTION,
+    SCOREBOARD_SECTION,
+)
+
+
+def lobby_changes_key(lobby_id: str) -> str:
+    return f"lobby:{lobby_id}:changes"
+
+
+# Increments the lobby version and stamps the changed sections with it;
+# a lobby that was deleted is left alone rather than recreated.
+#
+# KEYS[1]: lobby hash, KEYS[2]: changes set; ARGV: the changed sections
+BUMP_VERSION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+for _, section in ipairs(ARGV) do
+    redis.call('ZADD', KEYS[2], version, section)
+end
+return version
+"""
+
+
+async def bump_version(conn, lobby_id: str, *sections: str) -> int:
+    """
+    Record that some sections of a lobby's state changed.
+
+    Returns:
+        int: The lobby's new version, or 0 if the lobby doesn't exist.
+    """
+    script = conn.register_script(BUMP_VERSION_SCRIPT)
+    return await script(
+        keys=[f"lobby:{lobby_id}", lobby_changes_key(lobby_id)], args=list(sections)
+    )
+
+
+async def lobby_snapshot(
+    conn, lobby_id: str, since: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    A lobby's state, read in a single round trip.
+
+    Args:
+        conn: The Redis connection holding the lobby.
+        lobby_id (str): The lobby to read.
+        since (Optional[int]): A version the client already has; only the
+            sections changed after it are returned.
+
+    Returns:
+        Dict: The lobby version and the requested sections, or None if the
+        lobby doesn't exist.
+    """
+    lobby_key = f"lobby:{lobby_id}"
+    async with conn.pipeline(transaction=True) as pipe:
+        pipe.hgetall(lobby_key)
+        pipe.smembers(f"{lobby_key}:participants")
+        pipe.hgetall(f"{lobby_key}:players")
+        pipe.zrevrange(lobby_scores_key(lobby_id), 0, -1, withscores=True)
+        pipe.zrangebyscore(lobby_changes_key(lobby_id), f"({since or 0}", "+inf")
+        pipe.time()
+        lobby, participants, names, scores, changed, now = await pipe.execute()
+
+    if not lobby:
+        return None
+
+    version = int(lobby.get("version", 0))
+    # A version from the future means the client saw another lobby's state
+    # (e.g. before it was moved between nodes), so it gets everything
+    full = since is None or since > version
+    sections = SECTIONS if full else changed
+    # The clock of the lobby's Redis node, which times its rounds, to time
+    # the round deadline against
+    seconds, microseconds = now
+    snapshot = {
+        "lobby_id": lobby_id,
+        "version": version,
+        "full": full,
+        "server_time": seconds + microseconds / 1_000_000,
+    }
+
+    if LOBBY_SECTION in sections:
+        snapshot[LOBBY_SECTION] = {
+            "topic": lobby.get("topic"),
+            "creator_id": lobby.get("creator"),
+            "answer_mode": lobby.get("answer_mode", "text"),
+        }
+    if PLAYERS_SECTION in sections:
+        snapshot[PLAYERS_SECTION] = [
+            {"user_id": user_id, "player_name": names.get(user_id, "Unknown Player")}
+            for user_id in sorted(participants)
+        ]
+    if PHASE_SECTION in sections:
+        snapshot[PHASE_SECTION] = lobby.get("phase", LOBBY_PHASE)
+    if ROUNDS_SECTION in sections:
+        current_round = lobby.get("current_round")
+        snapshot[ROUNDS_SECTION] = {
+            "version": int(lobby.get("round_version", 0)),
+            "current_round": int(current_round) if current_round else None,
+            "round_started_at": (
+                float(lobby["round_started_at"]) if current_round else None
+            ),
+            "round_deadline": float(lobby["round_deadline"]) if current_round else None,
+        }
+    if SCOREBOARD_SECTION in sections:
+        snapshot[SCOREBOARD_SECTION] = [
+            {
+                "user_id": user_id,
+                "player_name": names.get(user_id, "Unknown Player"),
+                "score": score,
+            }
+            for user_id, score in scores
+        ]
+    return snapshot
+
+
+async def public_rounds(conn, lobby_id: str) -> Tuple[int, Optional[Dict]]:
+    """
+    A lobby's round data as sent to players, without the answers.
+
+    Returns:
+        Tuple[int, Optional[Dict]]: The round version, as in the snapshot's
+        rounds section, and the round data, or None if there is none yet.
+    """
+    lobby_key = f"lobby:{lobby_id}"
+    async with conn.pipeline(transaction=True) as pipe:
+        pipe.hget(lobby_key, "round_version")
+        pipe.hgetall(f"{lobby_key}:round_subtopics")
+        version, subtopics = await pipe.execute()
+
+    if not subtopics:
+        return int(version or 0), None
+    rounds = Rounds(
+        subtopics=[
+            Subtopic.model_validate_json(subtopics[index])
+            for index in sorted(subtopics, key=int)
+        ]
+    )
+    return int(version or 0), rounds.public_dump()
@@ -1,20 +1,105 @@
+import importlib
 import io
 import os
 import random
 import re
-from typing import Dict, List
-
-import pdfplumber
-from app.schemas import Rounds, StudyNarrative, StudyQuestion, Subtopic
-from docx import Document
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.hedging import (
+    LLM_DEADLINES_SECONDS,
+    LLMDeadlineExceeded,
+    LLMProviderError,
+    call_with_deadline,
+    deadline_exceeded,
+    is_client_timeout,
+    is_provider_error,
+    provider_error,
+)
+from app.llm_usage import record_usage
+from app.logs import log_error, log_event, truncate
+from app.metrics import (
+    LLM_FALLBACKS,
+    LLM_RETRIES,
+    LLM_WASTED_TOKENS,
+    track_llm_call,
+)
+from app.question_bank import (
+    banked_rounds,
+    find_subtopics,
+    save_flashcards,
+    save_subtopics,
+)
+from app.schemas import (
+    GeneratedNarrative,
+    GeneratedSubtopics,
+    Rounds,
+    StudyNarrative,
+    StudyQuestion,
+    Subtopic,
+)
 from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+
+# langchain, langchain_openai, pdfplumber and python-docx take most of a
+# worker's import time and memory, so they are imported where they are used;
+# `import_heavy_dependencies` loads them up front (e.g. in a preloading
+# gunicorn master, to share them copy-on-write)
+HEAVY_DEPENDENCIES = (
+    "docx",
+    "langchain.text_splitter",
+    "langchain_core.prompts",
+    "langchain_openai",
+    "pdfplumber",
+)
 
 # from langchain_ollama import ChatOllama
 
+# Number of subtopic rounds in a game
+ROUNDS_PER_GAME = 5
+
+# Attempts per LLM call before its reply is given up on
+GENERATION_MAX_ATTEMPTS = 3
+
+# Stream narratives to the lobby while they are generated
+NARRATIVE_STREAMING = os.getenv("NARRATIVE_STREAMING", "1") == "1"
+
+# Streamed narrative text is forwarded at most this often
+NARRATIVE_FRAME_SECONDS = 0.05
+
+# Where a streamed narrative reply names its planted mistake
+INCORRECT_STATEMENT_MARKER = re.compile(
+    r"\**\s*incorrect statement\s*\**\s*:\s*\**", re.IGNORECASE
+)
+
+# Where the incorrect statement may start, however the reply words the
+# marker (e.g. "Incorrect statement - ..."); nothing from here on is ever
+# forwarded
+INCORRECT_STATEMENT_HEADING = re.compile(r"\**\s*incorrect\s+statement", re.IGNORECASE)
+
+# Trailing characters held back in case they turn out to start the heading
+MARKER_HOLDBACK_CHARS = 32
+
+
+def import_heavy_dependencies() -> None:
+    for module in HEAVY_DEPENDENCIES:
+        importlib.import_module(module)
+
+
+def chat_model(kind: str, **kwargs):
+    """
+    The gpt-4o-mini chat model for a prompt kind, importing langchain_openai
+    on first use.
+
+    Requests time out at the kind's deadline and are not retried by the
+    client, so one given up on frees its thread instead of running past it;
+    `call_with_deadline` retries transient errors while the deadline allows.
+    """
+    from langchain_openai import ChatOpenAI
+
+    kwargs.setdefault("timeout", LLM_DEADLINES_SECONDS[kind])
+    kwargs.setdefault("max_retries", 0)
+    return ChatOpenAI(model="gpt-4o-mini", **kwargs)
+
 
 # Function to extract text from PDF using pdfplumber
 def extract_text_from_pdf(content: bytes) -> str:
@@ -28,6 +113,8 @@ def extract_text_from_pdf(content: bytes) -> str:
         str: Extracted text.
     """
     text = ""
+    import pdfplumber
+
     with pdfplumber.open(io.BytesIO(content)) as pdf:
         for page in pdf.pages:
             page_text = page.extract_text()
@@ -49,6 +136,8 @@ def extract_text_from_docx(content: bytes) -> str:
     """
     text = ""
     with io.BytesIO(content) as docx_file:
+        from docx import Document
+
         document = Document(docx_file)
         for para in document.paragraphs:
             text += para.text + "\n"
@@ -78,6 +167,8 @@ def process_document(
         # Assume it's plain text
         text = content.decode("utf-8")
 
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     # Split the document into chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,  # Adjust chunk size as needed
@@ -86,7 +177,9 @@ def process_document(
     documents = text_splitter.split_text(text)
 
     if generation_type == "flashcards":
-        return generate_flashcards_from_chunks(documents)
+        study_questions = generate_flashcards_from_chunks(documents)
+        save_flashcards(os.path.splitext(filename)[0], study_questions)
+        return study_questions
     elif generation_type == "narrative":
         return generate_narrative_with_misinformation(" ".join(documents))
     else:
@@ -105,7 +198,7 @@ def generate_flashcards_from_chunks(chunks: List[str]) -> List[StudyQuestion]:
             "OpenAI API key not found. Please set the OPENAI_API_KEY environment variable."
         )
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("flashcards", openai_api_key=openai_api_key)
     # llm = ChatOllama(model="phi3:3.8b")
 
     # Prompt template for generating questions
@@ -124,12 +217,14 @@ Text: {chunk}
 Questions:
 """
 
+    from langchain_core.prompts import PromptTemplate
+
     # Initialize the LLM Chain with the prompt template
     prompt = PromptTemplate(
         input_variables=["chunk"],
         template=prompt_template,
     )
-    chain = prompt | llm | StrOutputParser()
+    chain = prompt | llm
 
     study_questions = []
 
@@ -137,14 +232,14 @@ Questions:
     for chunk in chunks:
         try:
             # Generate the questions for each chunk
-            result = chain.invoke({"chunk": chunk})
+            result = invoke_llm(llm, {"chunk": chunk}, "flashcards", runnable=chain)
             # Split result into individual questions
             # Assuming the LLM separates questions by double newlines
-            questions = result.strip().split("\n\n")
+            questions = result.content.strip().split("\n\n")
             questions = [StudyQuestion.from_text(text) for text in questions]
             study_questions.extend(questions)
         except Exception as e:
-            print(f"Error generating questions for a chunk: {e}")
+            log_error("flashcards_failed", e)
 
     # Shuffle the questions to mix content from different sections
     random.shuffle(study_questions)
@@ -152,6 +247,171 @@ Questions:
     return study_questions
 
 
+def invoke_llm(llm, prompt, kind: str, runnable=None):
+    """
+    Invoke the LLM, recording its latency, token usage and cost under `kind`.
+
+    Args:
+        llm: The chat model being called.
+        prompt: The prompt, or the input of `runnable`.
+        kind (str): The prompt template: subtopics, narrative, grade or flashcards.
+        runnable: A chain or structured-output wrapper around `llm` to invoke
+            instead of the bare model.
+
+    Returns:
+        The reply of `runnable`, or of `llm` if no runnable is given.
+
+    Raises:
+        LLMDeadlineExceeded: If the call (and its hedge) missed the kind's deadline.
+        LLMProviderError: If the provider's API kept failing the call.
+    """
+
+    def call():
+        start = time.perf_counter()
+        with track_llm_call(kind):
+            response = (runnable or llm).invoke(prompt)
+
+        # Structured output with include_raw keeps the model's message under "raw"
+        message = response["raw"] if isinstance(response, dict) else response
+        record_usage(kind, llm.model_name, message, time.perf_counter() - start)
+        return response
+
+    # Each request, a hedge included, records its own usage
+    return call_with_deadline(call, kind)
+
+
+def invoke_structured(llm, schema, prompt: str, kind: str):
+    """
+    Invoke the LLM for a reply validated against a pydantic schema.
+
+    Replies that don't validate are retried on their own, so one malformed
+    reply never throws away the rest of a generation.
+
+    Args:
+        llm: The chat model to call.
+        schema: The pydantic model the reply must validate against.
+        prompt (str): The prompt to send.
+        kind (str): Prompt kind used to label the retry and wasted-token counters.
+
+    Returns:
+        An instance of `schema`.
+    """
+    structured_llm = llm.with_structured_output(schema, include_raw=True)
+
+    for attempt in range(GENERATION_MAX_ATTEMPTS):
+        result = invoke_llm(llm, prompt, kind, runnable=structured_llm)
+        if result["parsed"] is not None and result["parsing_error"] is None:
+            log_event(
+                "llm_reply",
+                kind=kind,
+                prompt=truncate(prompt),
+                reply=truncate(result["parsed"]),
+            )
+            return result["parsed"]
+
+        usage = getattr(result["raw"], "usage_metadata", None) or {}
+        LLM_WASTED_TOKENS.inc(usage.get("total_tokens", 0), kind=kind)
+        if attempt + 1 < GENERATION_MAX_ATTEMPTS:
+            LLM_RETRIES.inc(kind=kind)
+
+    raise ValueError(
+        f"LLM reply for {kind} did not match the expected format "
+        f"after {GENERATION_MAX_ATTEMPTS} attempts: {result['parsing_error']}"
+    )
+
+
+def stream_llm(llm, prompt: str, kind: str, on_text: Callable[[str], None]):
+    """
+    Stream the LLM's reply, handing each piece of text to `on_text` as it
+    arrives, and record latency, token usage and cost like `invoke_llm`.
+
+    Returns:
+        The whole reply message.
+
+    Raises:
+        LLMDeadlineExceeded: If the reply isn't complete by the kind's deadline,
+            or the client timed the request out.
+        LLMProviderError: If the provider's API failed the request.
+    """
+    deadline = LLM_DEADLINES_SECONDS.get(kind)
+    start = time.perf_counter()
+    message = None
+    with track_llm_call(kind):
+        try:
+            for chunk in llm.stream(prompt):
+                on_text(chunk.content)
+                message = chunk if message is None else message + chunk
+                # The client's timeout is per read, so a slow but steady
+                # stream is cut off here
+                if deadline is not None and time.perf_counter() - start > deadline:
+                    raise deadline_exceeded(kind)
+        except Exception as e:
+            if isinstance(e, LLMDeadlineExceeded):
+                raise
+            if is_client_timeout(e):
+                raise deadline_exceeded(kind) from e
+            if is_provider_error(e):
+                raise provider_error(kind, e) from e
+            raise
+
+    record_usage(kind, llm.model_name, message, time.perf_counter() - start)
+    return message
+
+
+class NarrativeStream:
+    """
+    Forwards a streamed narrative reply in frames of about
+    NARRATIVE_FRAME_SECONDS, holding back its "Incorrect statement:" section.
+
+    Text is only forwarded once it is known not to start that section, so a
+    reply without a proper marker never sends the statement either.
+    """
+
+    def __init__(self, on_text: Callable[[str], None]):
+        self.on_text = on_text
+        self.text = ""
+        self.sent = 0
+        self.last_frame = time.perf_counter()
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        if time.perf_counter() - self.last_frame >= NARRATIVE_FRAME_SECONDS:
+            self._flush()
+
+    def close(self) -> None:
+        """
+        Forward the rest of the narrative. Without an incorrect statement
+        heading, the held back tail is dropped: it may hold the statement,
+        and the reply will be retried anyway.
+        """
+        self._flush()
+
+    def result(self) -> tuple[str, str]:
+        """
+        The narrative and its incorrect statement, once the reply is complete.
+        """
+        match = INCORRECT_STATEMENT_MARKER.search(self.text)
+        if match is None:
+            raise ValueError("Narrative reply has no incorrect statement")
+        narrative = self.text[: match.start()].strip()
+        incorrect_statement = self.text[match.end() :].strip().strip('"')
+        if not narrative or not incorrect_statement:
+            raise ValueError("Narrative reply is missing a section")
+        return narrative, incorrect_statement
+
+    def _flush(self) -> None:
+        match = INCORRECT_STATEMENT_HEADING.search(self.text, self.sent)
+        if match is not None:
+            end = match.start()
+        else:
+            end = len(self.text) - MARKER_HOLDBACK_CHARS
+
+        if end > self.sent:
+            self.on_text(self.text[self.sent : end])
+            self.sent = end
+        self.last_frame = time.perf_counter()
+
+
 def generate_narrative_with_misinformation(content: str) -> StudyNarrative:
 
     load_dotenv()
@@ -159,83 +419,249 @@ def generate_narrative_with_misinformation(content: str) -> StudyNarrative:
     if not openai_api_key:
         raise ValueError("OpenAI API key not found.")
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("narrative", openai_api_key=openai_api_key)
 
     prompt_template = f"""
         You are an expert educational content creator. Given the following content, create a flowing narrative explanation of the subject with 1 intentionally incorrect statement embedded.
-        The players will need to identify this incorrect statement. List the incorrect statement at the end.
+        The players will need to identify this incorrect statement. Return the incorrect statement separately as well.
 
         Content: {content}
-
-        Format:
-        Narrative:
-        [narrative here]
-
-        Incorrect statement:
-        1. <incorrect statement>
     """
-    response = llm.invoke(prompt_template)
-    narrative_text = response.content
-    print("raw narrative", narrative_text)
+    generated = invoke_structured(llm, GeneratedNarrative, prompt_template, "narrative")
 
-    # print("RAW RESPONSE: ", narrative_text)
-
-    narrative_parts = narrative_text.split("Incorrect statement:")
-    narrative = narrative_parts[0].strip()
-    incorrect_statements = [
-        line.strip() for line in narrative_parts[1].strip().split("\n")
-    ]
+    return StudyNarrative(
+        narrative=generated.narrative.strip(),
+        misinformation=[generated.incorrect_statement.strip()],
+    )
 
-    print("narrative part", narrative)
-    print("misinfo", incorrect_statements)
 
-    return StudyNarrative(narrative=narrative, misinformation=incorrect_statements)
+def generate_bullets_from_topic(
+    topic: str, on_narrative: Optional[Callable[[Dict], None]] = None
+) -> Rounds:
+    """
+    Generate the rounds of a game about `topic`.
 
+    Args:
+        topic (str): The main topic of the game.
+        on_narrative: If given (and NARRATIVE_STREAMING is on), narratives are
+            streamed as they are generated and this is called with each
+            `narrative_start` and `narrative_chunk` event to forward.
 
-def generate_bullets_from_topic(topic: str) -> StudyNarrative:
+    Returns:
+        Rounds: ROUNDS_PER_GAME subtopics with their narratives.
+    """
+    # Reuse rounds banked for related topics, keeping the freshness ratio
+    stopics = find_subtopics(topic, banked_rounds(ROUNDS_PER_GAME))
+    reused = len(stopics)
+    if reused == ROUNDS_PER_GAME:
+        return Rounds(subtopics=stopics)
 
     load_dotenv()
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
         raise ValueError("OpenAI API key not found.")
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("subtopics", openai_api_key=openai_api_key)
 
     prompt_template = f"""
         You are an expert educational content creator. Given the following topic, create as litle as 10 aor as much as 40 subtopics relating to the main topic provided. 
         They must be subcategories of the main topic provided.
 
         Content: {topic}
-
-        Format:
-        . <subtopic 1>
-        . <subtopic 2>
-        . <subtopic 3>
     """
-    response = llm.invoke(prompt_template)
-    narrative_text = response.content
-
-    subtopics = narrative_text.split(".")
+    try:
+        generated = invoke_structured(
+            llm, GeneratedSubtopics, prompt_template, "subtopics"
+        )
+    except (LLMDeadlineExceeded, LLMProviderError) as e:
+        # Without subtopics to write about, fill the game from the bank
+        log_error("subtopics_unavailable", e, topic=topic)
+        banked = unplayed_banked_subtopics(
+            topic, stopics, ROUNDS_PER_GAME - len(stopics)
+        )
+        LLM_FALLBACKS.inc(len(banked), kind="subtopics", fallback="question_bank")
+        stopics.extend(banked)
+        if len(stopics) < ROUNDS_PER_GAME:
+            raise
+        return Rounds(subtopics=stopics)
+
+    # Deduplicate while keeping the LLM's order, then shuffle into a pool
+    subtopics = list(dict.fromkeys(name.strip() for name in generated.subtopics))
+    banked_names = {subtopic.name.lower() for subtopic in stopics}
+    subtopics = [
+        name for name in subtopics if name and name.lower() not in banked_names
+    ]
+    random.shuffle(subtopics)
 
-    random_numbers = random.sample(range(0, len(subtopics)), 5)
-    selected_topics = []
-    for num in random_numbers:
-        selected_topics.append(subtopics[num])
+    fallbacks = []
+    for subtopic in subtopics:
+        if len(stopics) == ROUNDS_PER_GAME:
+            break
 
-    # print(selected_topics)
-    stopics = []
-    for topic in selected_topics:
-        print(topic)
         location = random.sample(["start", "middle", "end"], k=1)[0]
-        narrative, incorrect_statements = generate_narrative_from_topic(topic, location)
+        index = len(stopics)
+        try:
+            if on_narrative is not None and NARRATIVE_STREAMING:
+                narrative, incorrect_statement = stream_narrative_from_topic(
+                    subtopic,
+                    location,
+                    on_start=lambda: on_narrative(
+                        {"type": "narrative_start", "subtopicIndex": index}
+                    ),
+                    on_text=lambda text: on_narrative(
+                        {
+                            "type": "narrative_chunk",
+                            "subtopicIndex": index,
+                            "text": text,
+                        }
+                    ),
+                )
+            else:
+                narrative, incorrect_statement = generate_narrative_from_topic(
+                    subtopic, location
+                )
+        except (LLMDeadlineExceeded, LLMProviderError) as e:
+            # Serve a banked round instead, if there is one not played yet;
+            # otherwise the next subtopic in the pool replaces this one
+            log_error("narrative_unavailable", e, subtopic=subtopic)
+            for banked in unplayed_banked_subtopics(topic, stopics, 1):
+                LLM_FALLBACKS.inc(kind="narrative", fallback="question_bank")
+                stopics.append(banked)
+                fallbacks.append(banked)
+                if on_narrative is not None and NARRATIVE_STREAMING:
+                    # Replace whatever was streamed before the call failed
+                    on_narrative({"type": "narrative_start", "subtopicIndex": index})
+                    on_narrative(
+                        {
+                            "type": "narrative_chunk",
+                            "subtopicIndex": index,
+                            "text": banked.narrative,
+                        }
+                    )
+            continue
+        except ValueError as e:
+            # Only this subtopic is lost; the next one in the pool replaces it
+            log_error("narrative_failed", e, subtopic=subtopic)
+            continue
+
+        # Index the sentences so players can also answer by picking one
+        sentences = split_sentences(narrative)
+        try:
+            misinformation_sentences = locate_misinformation(
+                sentences, incorrect_statement
+            )
+        except ValueError as e:
+            # The round is still played, shown as plain text and answered by
+            # typing, rather than throwing away a narrative already paid for
+            log_error("misinformation_not_located", e, subtopic=subtopic)
+            sentences, misinformation_sentences = [], []
+
         stopics.append(
             Subtopic(
-                name=topic, narrative=narrative, misinformation=incorrect_statements
+                name=subtopic,
+                narrative=narrative,
+                misinformation=incorrect_statement,
+                sentences=sentences,
+                misinformation_sentences=misinformation_sentences,
             )
         )
+
+    save_subtopics(
+        topic,
+        [generated for generated in stopics[reused:] if generated not in fallbacks],
+    )
+
+    if len(stopics) < ROUNDS_PER_GAME:
+        raise ValueError(
+            f"Only generated {len(stopics)} of {ROUNDS_PER_GAME} rounds for {topic!r}"
+        )
     return Rounds(subtopics=stopics)
 
 
+def unplayed_banked_subtopics(
+    topic: str, played: List[Subtopic], count: int
+) -> List[Subtopic]:
+    """
+    Up to `count` banked subtopics matching `topic` that aren't in `played`.
+    """
+    played_names = {subtopic.name.lower() for subtopic in played}
+    return [
+        banked
+        for banked in find_subtopics(topic, count + len(played))
+        if banked.name.lower() not in played_names
+    ][:count]
+
+
+# Abbreviations whose period doesn't end a sentence
+SENTENCE_ABBREVIATIONS = ("Dr", "Mr", "Mrs", "Ms", "St", "Prof", "vs", "e.g", "i.e")
+
+# A sentence ends at ., ! or ? followed by whitespace and a capital or digit,
+# or at a blank line
+SENTENCE_BOUNDARY = re.compile(
+    "".join(rf"(?<!\b{re.escape(abbr)}\.)" for abbr in SENTENCE_ABBREVIATIONS)
+    + r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n"
+)
+
+# Least word overlap (Jaccard) between a paraphrased incorrect statement and
+# the narrative sentence it is matched to; anything less counts as not found
+MIN_SENTENCE_OVERLAP = 0.5
+
+
+def split_sentences(text: str) -> List[str]:
+    return [
+        sentence.strip()
+        for sentence in SENTENCE_BOUNDARY.split(text)
+        if sentence.strip()
+    ]
+
+
+def locate_misinformation(sentences: List[str], misinformation: str) -> List[int]:
+    """
+    Find the sentences of a narrative that make up its incorrect statement.
+
+    Args:
+        sentences (List[str]): The narrative, split by `split_sentences`.
+        misinformation (str): The incorrect statement.
+
+    Returns:
+        List[int]: Indexes into `sentences`, in order.
+
+    Raises:
+        ValueError: If some part of the statement matches no sentence.
+    """
+    found = set()
+    for statement in split_sentences(misinformation):
+        exact = [
+            index
+            for index, sentence in enumerate(sentences)
+            if statement.lower() in sentence.lower()
+        ]
+        if exact:
+            found.add(exact[0])
+            continue
+
+        # Paraphrased: the sentence sharing the most words, if it shares enough
+        expected = grading_words(statement)
+        best_index, best_overlap = None, 0.0
+        for index, sentence in enumerate(sentences):
+            actual = grading_words(sentence)
+            if not expected or not actual:
+                continue
+            overlap = len(expected & actual) / len(expected | actual)
+            if overlap > best_overlap:
+                best_index, best_overlap = index, overlap
+
+        if best_index is None or best_overlap < MIN_SENTENCE_OVERLAP:
+            raise ValueError(
+                f"Incorrect statement not found in narrative: {statement!r}"
+            )
+        found.add(best_index)
+
+    if not found:
+        raise ValueError("Incorrect statement is empty")
+    return sorted(found)
+
+
 def generate_narrative_from_topic(content: str, location) -> tuple[str, str]:
 
     load_dotenv()
@@ -243,39 +669,77 @@ def generate_narrative_from_topic(content: str, location) -> tuple[str, str]:
     if not openai_api_key:
         raise ValueError("OpenAI API key not found.")
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("narrative", openai_api_key=openai_api_key)
 
-    prompt_template = f"""
-        Given the following topic, create a flowing narrative with an explanation of the subject with 1 intentionally incorrect statement. Explain the topic, but include a sentence or concept that is
-        wrong. You will say the wrong concept or statement as if it were true. You know it is not true, but you are trying to trick the players to think it is true, so state it with confidence. Place the incorrect statement 
-        at the {location} of yor text. Remeber this statement at the {location} of your text will be incorrect, but you will say it as if it was correct. You will place it around the {location}, but not exactly at the {location}.
-        This is a game where players will need to identify the incorrect part of your text. List the incorrect statement as the format states.
+    prompt_template = narrative_prompt(content, location)
+    generated = invoke_structured(llm, GeneratedNarrative, prompt_template, "narrative")
 
-        Topic: {content}
+    return generated.narrative.strip(), generated.incorrect_statement.strip()
 
-        Format:
-        Narrative:
-        [narrative here]
 
-        Incorrect statement:
-        1. <incorrect statement>
+def stream_narrative_from_topic(
+    content: str,
+    location,
+    on_start: Callable[[], None],
+    on_text: Callable[[str], None],
+) -> tuple[str, str]:
     """
-    response = llm.invoke(prompt_template)
-    narrative_text = response.content
+    Like `generate_narrative_from_topic`, but the narrative is handed to
+    `on_text` in frames while it is generated. The incorrect statement is
+    never passed on.
 
-    # print("RAW RESPONSE: ", narrative_text)
+    `on_start` is called before every attempt, so whoever shows the text
+    can drop what a failed attempt already sent.
+    """
+    load_dotenv()
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError("OpenAI API key not found.")
+
+    llm = chat_model("narrative", openai_api_key=openai_api_key, stream_usage=True)
+
+    prompt_template = narrative_prompt(content, location) + """
+        Write the narrative as plain text. After it, on a line of its own, write "Incorrect statement:" followed by the incorrect statement exactly as it appears in the narrative.
+    """
+
+    for attempt in range(GENERATION_MAX_ATTEMPTS):
+        on_start()
+        stream = NarrativeStream(on_text)
+        message = stream_llm(llm, prompt_template, "narrative", stream.feed)
+        stream.close()
+        try:
+            narrative, incorrect_statement = stream.result()
+        except ValueError as e:
+            error = e
+            usage = getattr(message, "usage_metadata", None) or {}
+            LLM_WASTED_TOKENS.inc(usage.get("total_tokens", 0), kind="narrative")
+            if attempt + 1 < GENERATION_MAX_ATTEMPTS:
+                LLM_RETRIES.inc(kind="narrative")
+            continue
+
+        log_event(
+            "llm_reply",
+            kind="narrative",
+            prompt=truncate(prompt_template),
+            reply=truncate(stream.text),
+        )
+        return narrative, incorrect_statement
+
+    raise ValueError(
+        f"LLM reply for narrative did not match the expected format "
+        f"after {GENERATION_MAX_ATTEMPTS} attempts: {error}"
+    )
 
-    narrative_parts = narrative_text.split("Incorrect statement:")
-    narrative = narrative_parts[0].strip()
-    narrative = re.sub(r"(\*?\s*Narrative\s*:?\s*\*?)", "", narrative).strip()
-    incorrect_statements = [
-        line.strip() for line in narrative_parts[1].strip().split("\n")
-    ]
 
-    print("narrative part", narrative)
-    print("misinfo", incorrect_statements)
+def narrative_prompt(content: str, location) -> str:
+    return f"""
+        Given the following topic, create a flowing narrative with an explanation of the subject with 1 intentionally incorrect statement. Explain the topic, but include a sentence or concept that is
+        wrong. You will say the wrong concept or statement as if it were true. You know it is not true, but you are trying to trick the players to think it is true, so state it with confidence. Place the incorrect statement 
+        at the {location} of yor text. Remeber this statement at the {location} of your text will be incorrect, but you will say it as if it was correct. You will place it around the {location}, but not exactly at the {location}.
+        This is a game where players will need to identify the incorrect part of your text. Return the incorrect statement separately as well.
 
-    return narrative, incorrect_statements[0]
+        Topic: {content}
+    """
 
 
 def grade_player_raw_answers(
@@ -304,7 +768,7 @@ def grade_player_raw_answers(
     if not openai_api_key:
         raise ValueError("OpenAI API key not found.")
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("grade", openai_api_key=openai_api_key)
 
     # The correct misinformation
     # Only 1 incorrect statement
@@ -327,12 +791,16 @@ def grade_player_raw_answers(
         For example:
         Final Score: 1
         """
-        print(f"Prompt for player {player}:\n{prompt}")
-
         try:
-            response = llm.invoke(prompt)
+            response = invoke_llm(llm, prompt, "grade")
             response_text = response.content.strip()
-            print(f"Response for player {player}:\n{response_text}")
+            log_event(
+                "llm_reply",
+                kind="grade",
+                player=player,
+                prompt=truncate(prompt),
+                reply=truncate(response_text),
+            )
 
             # extract score after 'Final Score:'
             score_match = re.search(r"(Final Score:)\s*\**(\d)\**", response_text)
@@ -343,7 +811,7 @@ def grade_player_raw_answers(
                 correctness_score = 0  # default to 0 if no valid score found
 
         except Exception as e:
-            print(f"Error grading answer for player {player}: {e}")
+            log_error("grade_failed", e, player=player)
             correctness_score = 0  # default to 0 in case of error
 
         raw_scores[player] = correctness_score
@@ -388,23 +856,100 @@ def grade_individual_answer(
     if not openai_api_key:
         raise ValueError("OpenAI API key not found.")
 
-    llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=openai_api_key)
+    llm = chat_model("grade", openai_api_key=openai_api_key)
 
     try:
-        response = llm.invoke(prompt)
+        response = invoke_llm(llm, prompt, "grade")
         response_text = response.content.strip()
-        print(misinformation)
-        print("RAW", response_text)
+        log_event(
+            "llm_reply",
+            kind="grade",
+            misinformation=truncate(misinformation),
+            reply=truncate(response_text),
+        )
         score_match = re.search(r"(Final Score:)\s*\**(\d)\**", response_text)
         if score_match:
             return int(score_match.group(2))  # return 1 or 0 based on grading
         else:
             return 0  # default to 0 if no valid score found
+    except (LLMDeadlineExceeded, LLMProviderError) as e:
+        # Grade locally rather than hold the player's result any longer, or
+        # mark a right answer wrong because the provider failed
+        log_error("grade_unavailable", e)
+        LLM_FALLBACKS.inc(kind="grade", fallback="heuristic")
+        return heuristic_grade(player_answer, misinformation)
     except Exception as e:
-        print(f"Error grading answer: {e}")
+        log_error("grade_failed", e)
         return 0  # default to 0 in case of error
 
 
+# Words ignored when comparing an answer to the incorrect statement
+GRADING_STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "by",
+    "for",
+    "from",
+    "in",
+    "is",
+    "it",
+    "not",
+    "of",
+    "on",
+    "or",
+    "that",
+    "the",
+    "this",
+    "to",
+    "was",
+    "were",
+    "with",
+}
+
+
+def heuristic_grade(player_answer: str, misinformation: str, threshold=0.5) -> int:
+    """
+    Grade an answer without the LLM, by word overlap with the incorrect statement.
+
+    Used when the LLM can't be called, e.g. once a lobby is over its spend cap.
+
+    Args:
+        player_answer (str): The player's guess.
+        misinformation (str): The incorrect statement from the narrative.
+        threshold (float): Share of the statement's words the answer must contain.
+
+    Returns:
+        int: 1 if the answer is judged correct, 0 otherwise.
+    """
+
+    expected = grading_words(misinformation)
+    if not expected:
+        return 0
+    overlap = len(grading_words(player_answer) & expected) / len(expected)
+    return 1 if overlap >= threshold else 0
+
+
+def grading_words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9']+", text.lower())) - GRADING_STOPWORDS
+
+
+def grade_sentence_pick(
+    sentence_index: int, misinformation_sentences: List[int]
+) -> int:
+    """
+    Grade a player who answered by picking a sentence of the narrative.
+
+    Returns:
+        int: 1 if the sentence is (part of) the incorrect statement, 0 otherwise.
+    """
+    return 1 if sentence_index in misinformation_sentences else 0
+
+
 def adjust_scores_based_on_time(
     player_answers: Dict[str, Dict[str, float]],
     raw_scores: Dict[str, int],
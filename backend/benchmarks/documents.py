@@ -0,0 +1,83 @@
+"""
+Synthetic PDF and DOCX documents of a given size for the extraction benchmarks.
+"""
+
+import io
+from typing import List
+
+LINES_PER_PAGE = 40
+
+SAMPLE_SENTENCES = [
+    "The War of 1812 was fought between the United States and Great Britain.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The mitochondria produce most of the chemical energy needed by the cell.",
+    "Mount Everest is the highest mountain above sea level on Earth.",
+    "The printing press spread literacy across Europe in the fifteenth century.",
+]
+
+
+def sample_lines(count: int) -> List[str]:
+    return [
+        f"{index + 1}. {SAMPLE_SENTENCES[index % len(SAMPLE_SENTENCES)]}"
+        for index in range(count)
+    ]
+
+
+def make_pdf(pages: int) -> bytes:
+    """
+    A PDF of `pages` pages, each with LINES_PER_PAGE lines of Helvetica text.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    lines = sample_lines(pages * LINES_PER_PAGE)
+    for page in range(pages):
+        text = ["BT /F1 10 Tf 14 TL 40 800 Td"]
+        for line in lines[page * LINES_PER_PAGE : (page + 1) * LINES_PER_PAGE]:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text.append(f"({escaped}) Tj T*")
+        text.append("ET")
+        stream = "\n".join(text).encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int) -> bytes:
+    """
+    A DOCX document of `paragraphs` paragraphs.
+    """
+    from docx import Document
+
+    document = Document()
+    for line in sample_lines(paragraphs):
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
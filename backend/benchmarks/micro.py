@@ -0,0 +1,283 @@
+"""
+Offline micro-benchmarks of the parsing, scoring and extraction hot paths.
+
+LLM replies come from the fixtures in benchmarks/fixtures, so nothing here
+calls the API; structured replies are kept as whole chat completion response
+bodies and served to the real client in place of the network. Every run is saved to benchmarks/results/ (not committed) and
+compared to the committed baseline, benchmarks/baseline.json, or the one
+given with --baseline; a benchmark slower than the baseline by more than the
+threshold is flagged and fails the run. Timings only compare on similar
+machines, so regenerate the baseline with --save-baseline when the one in
+the repo came from different hardware.
+
+Usage (from backend/):
+    python -m benchmarks.micro [-k NAME] [--baseline PATH] [--save-baseline]
+        [--threshold 0.2]
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import httpx
+from app.schemas import GeneratedNarrative, Rounds, StudyQuestion, Subtopic
+from app.utils import (
+    NarrativeStream,
+    adjust_scores_based_on_time,
+    chat_model,
+    extract_text_from_docx,
+    extract_text_from_pdf,
+    locate_misinformation,
+    split_sentences,
+)
+from benchmarks.documents import make_docx, make_pdf
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+RESULTS_DIR = Path(__file__).parent / "results"
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Timing runs per benchmark; each run repeats the call for at least 0.2 s
+REPEAT = 5
+
+# Token size the recorded narrative is streamed in
+STREAM_CHUNK_CHARS = 4
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text()
+
+
+def bench_study_question_from_text() -> Callable:
+    reply = fixture("flashcards_reply.txt")
+    return lambda: [StudyQuestion.from_text(text) for text in reply.split("\n\n")]
+
+
+def recorded_narrative() -> GeneratedNarrative:
+    """
+    The narrative reply held in the recorded chat completion.
+    """
+    completion = json.loads(fixture("narrative_completion.json"))
+    return GeneratedNarrative.model_validate_json(
+        completion["choices"][0]["message"]["content"]
+    )
+
+
+def bench_narrative_structured_parse() -> Callable:
+    """
+    The reply handling of `generate_narrative_from_topic`: its structured
+    output call on the same chat model, with the HTTP request answered by the
+    recorded response body, so it times building the request and the OpenAI
+    client's and langchain's parsing of the reply.
+    """
+    completion = fixture("narrative_completion.json")
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, content=completion, headers={"content-type": "application/json"}
+        )
+    )
+    llm = chat_model(
+        "narrative",
+        openai_api_key="offline",
+        http_client=httpx.Client(transport=transport),
+    )
+    structured_llm = llm.with_structured_output(GeneratedNarrative, include_raw=True)
+    # The OpenAI client warns when it serializes its own parsed reply
+    warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
+
+    def parse():
+        generated = structured_llm.invoke("Write the narrative.")["parsed"]
+        return generated.narrative.strip(), generated.incorrect_statement.strip()
+
+    return parse
+
+
+def bench_narrative_stream_parse() -> Callable:
+    reply = fixture("narrative_stream.txt")
+    chunks = [
+        reply[i : i + STREAM_CHUNK_CHARS]
+        for i in range(0, len(reply), STREAM_CHUNK_CHARS)
+    ]
+
+    def parse():
+        stream = NarrativeStream(lambda text: None)
+        for chunk in chunks:
+            stream.feed(chunk)
+        stream.close()
+        return stream.result()
+
+    return parse
+
+
+def bench_narrative_sentence_index() -> Callable:
+    generated = recorded_narrative()
+
+    def index():
+        sentences = split_sentences(generated.narrative)
+        return locate_misinformation(sentences, generated.incorrect_statement)
+
+    return index
+
+
+def bench_adjust_scores(players: int) -> Callable:
+    rng = random.Random(players)
+    player_answers = {
+        f"player{i}": {"response_time": rng.uniform(0, 60)} for i in range(players)
+    }
+    raw_scores = {f"player{i}": rng.randint(0, 1) for i in range(players)}
+    return lambda: adjust_scores_based_on_time(player_answers, raw_scores)
+
+
+def bench_extract_pdf(pages: int) -> Callable:
+    content = make_pdf(pages)
+    return lambda: extract_text_from_pdf(content)
+
+
+def bench_extract_docx(paragraphs: int) -> Callable:
+    content = make_docx(paragraphs)
+    return lambda: extract_text_from_docx(content)
+
+
+def bench_rounds_json_roundtrip() -> Callable:
+    generated = recorded_narrative()
+    sentences = split_sentences(generated.narrative)
+    subtopic = Subtopic(
+        name="The Treaty of Ghent",
+        narrative=generated.narrative,
+        misinformation=generated.incorrect_statement,
+        sentences=sentences,
+        misinformation_sentences=locate_misinformation(
+            sentences, generated.incorrect_statement
+        ),
+    )
+    rounds = Rounds(subtopics=[subtopic] * 5)
+
+    # As stored in and read back from Redis
+    return lambda: Rounds.model_validate(json.loads(json.dumps(rounds.model_dump())))
+
+
+# Benchmark name -> setup returning the call to time
+BENCHMARKS: Dict[str, Callable[[], Callable]] = {
+    "study_question_from_text": bench_study_question_from_text,
+    "narrative_structured_parse": bench_narrative_structured_parse,
+    "narrative_stream_parse": bench_narrative_stream_parse,
+    "narrative_sentence_index": bench_narrative_sentence_index,
+    "adjust_scores_100": lambda: bench_adjust_scores(100),
+    "adjust_scores_10000": lambda: bench_adjust_scores(10_000),
+    "adjust_scores_100000": lambda: bench_adjust_scores(100_000),
+    "extract_pdf_1_page": lambda: bench_extract_pdf(1),
+    "extract_pdf_10_pages": lambda: bench_extract_pdf(10),
+    "extract_pdf_50_pages": lambda: bench_extract_pdf(50),
+    "extract_docx_100_paragraphs": lambda: bench_extract_docx(100),
+    "extract_docx_1000_paragraphs": lambda: bench_extract_docx(1000),
+    "extract_docx_5000_paragraphs": lambda: bench_extract_docx(5000),
+    "rounds_json_roundtrip": bench_rounds_json_roundtrip,
+}
+
+
+def measure(call: Callable) -> Dict[str, float]:
+    """
+    Seconds per call: the best and the median of REPEAT timing runs.
+    """
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    runs = [total / number for total in timer.repeat(repeat=REPEAT, number=number)]
+    return {"best": min(runs), "median": statistics.median(runs)}
+
+
+def run(selected: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if selected and selected not in name:
+            continue
+        results[name] = measure(setup())
+        print(f"{name:<32} {format_seconds(results[name]['best']):>10}", flush=True)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> Dict[str, float]:
+    """
+    Benchmarks whose best time grew by more than `threshold` (0.2 = 20%) over
+    the baseline, with their change.
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result["best"] / baseline[name]["best"] - 1
+        if change > threshold:
+            regressions[name] = change
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", help="Only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="Results to compare to, or to save with --save-baseline",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Make this run the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown over the baseline flagged as a regression (0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    results = run(args.k)
+    run_record = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    run_path = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    run_path.write_text(json.dumps(run_record, indent=2))
+    print(f"\nSaved {run_path}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(run_record, indent=2) + "\n")
+        print(f"Saved baseline {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("No baseline to compare to; run with --save-baseline to create one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline["results"], args.threshold)
+    for name, change in regressions.items():
+        print(f"REGRESSION {name}: {change:+.0%} vs baseline")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions over {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Worker startup benchmark: import time and peak RSS of a fresh interpreter
+loading the app, with and without the LLM and document libraries.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--runs 5] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# What a worker imports before serving its first request
+SCENARIOS = {
+    # A worker that only serves lobby REST and WebSocket traffic
+    "lobby_worker": "import app.main",
+    # A worker that has generated rounds or graded an answer
+    "llm_worker": (
+        "import app.main; from app.utils import import_heavy_dependencies; "
+        "import_heavy_dependencies()"
+    ),
+}
+
+MEASURE = """
+import resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024  # macOS reports bytes
+print(elapsed, rss_kb)
+"""
+
+
+def measure(code: str, runs: int) -> Dict[str, float]:
+    """
+    Median import seconds and peak RSS (MB) of `code` over fresh interpreters.
+    """
+    seconds: List[float] = []
+    rss_mb: List[float] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(code=code)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        seconds.append(float(output[0]))
+        rss_mb.append(int(output[1]) / 1024)
+    return {
+        "import_seconds": statistics.median(seconds),
+        "peak_rss_mb": statistics.median(rss_mb),
+    }
+
+
+def run(runs: int) -> Dict[str, Dict[str, float]]:
+    return {name: measure(code, runs) for name, code in SCENARIOS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['import_seconds'] * 1000:8.1f} ms"
+            f" {result['peak_rss_mb']:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# Gunicorn settings for `gunicorn -c gunicorn.conf.py app.main:app`
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork the workers from it, so they
+# share its code pages copy-on-write and boot without importing anything.
+# Redis clients and the question bank are opened per worker, after the fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Also load the LLM and document libraries in the master, for deployments
+# where every worker generates rounds; otherwise each worker imports them
+# the first time it calls the LLM
+PRELOAD_LLM = os.getenv("PRELOAD_LLM", "0") == "1"
+
+
+def on_starting(server):
+    if preload_app and PRELOAD_LLM:
+        from app.utils import import_heavy_dependencies
+
+        import_heavy_dependencies()
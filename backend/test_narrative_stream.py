@@ -0,0 +1,61 @@
+# test_narrative_stream.py
+
+import pytest
+
+import app.utils
+from app.utils import NarrativeStream
+
+NARRATIVE = (
+    "The War of 1812 was fought between the United States and Britain. "
+    "It ended with the Treaty of Ghent."
+)
+
+
+def stream_reply(reply, chunk_chars=7):
+    """
+    Feed a reply to a NarrativeStream in small chunks, flushing a frame after
+    every chunk, and return the stream and everything it forwarded.
+    """
+    forwarded = []
+    stream = NarrativeStream(forwarded.append)
+    for i in range(0, len(reply), chunk_chars):
+        stream.feed(reply[i : i + chunk_chars])
+    stream.close()
+    return stream, "".join(forwarded)
+
+
+@pytest.fixture(autouse=True)
+def flush_every_chunk(monkeypatch):
+    monkeypatch.setattr(app.utils, "NARRATIVE_FRAME_SECONDS", 0)
+
+
+def test_forwards_the_narrative_only():
+    stream, forwarded = stream_reply(
+        NARRATIVE + "\n**Incorrect statement:** It ended in 1815."
+    )
+    assert forwarded.strip() == NARRATIVE
+    assert stream.result() == (NARRATIVE, "It ended in 1815.")
+
+
+@pytest.mark.parametrize(
+    "section",
+    [
+        "\nIncorrect statement - It ended in 1815.",
+        "\nIncorrect statement\n1. It ended in 1815.",
+        "\nINCORRECT  STATEMENT It ended in 1815.",
+    ],
+)
+def test_holds_back_a_loosely_marked_statement(section):
+    stream, forwarded = stream_reply(NARRATIVE + section)
+    assert "1815" not in forwarded
+    assert "ncorrect" not in forwarded.lower()
+    with pytest.raises(ValueError):
+        stream.result()
+
+
+def test_drops_the_held_back_tail_without_a_marker():
+    stream, forwarded = stream_reply(NARRATIVE + " It ended in 1815.")
+    assert "1815" not in forwarded
+    assert NARRATIVE.startswith(forwarded)
+    with pytest.raises(ValueError):
+        stream.result()
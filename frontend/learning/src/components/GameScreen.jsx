@@ -18,10 +18,13 @@ const GameScreen = () => {
   const [userId, setUserId] = useState(null);
   const [playerName, setPlayerName] = useState("");
   const [isHost, setIsHost] = useState(false);
+  const [answerMode, setAnswerMode] = useState("text"); // "text" or "sentence"
   const [isGenerating, setIsGenerating] = useState(true); // Track if round is generating
   const [scores, setScores] = useState({}); // Player scores
   const [hasGuessedCorrectly, setHasGuessedCorrectly] = useState(false); // Track if player guessed correctly
   const [correctGuessCount, setCorrectGuessCount] = useState(0); // Track how many players have guessed correctly
+  const [pickedSentence, setPickedSentence] = useState(null); // The one sentence picked this round, if any
+  const [streamedNarratives, setStreamedNarratives] = useState({}); // Narrative text streamed while rounds generate
 
   // Initialize userId and playerName from localStorage
   useEffect(() => {
@@ -37,43 +40,67 @@ const GameScreen = () => {
     setUserId(storedUserId);
     setPlayerName(storedPlayerName);
 
-    // Determine if the player is the host
-    instance
-      .get(`/lobby/${lobbyId}`)
-      .then((response) => {
-        if (response.data.creator_id === storedUserId) {
-          console.log("We are host - call startRound()");
-          setIsHost(true);
-          // If the player is the host, kick off round generation immediately
-          startRound();
-        }
-      })
-      .catch(() => {
+    // Rebuild the game from the lobby snapshot, so a player who reconnects
+    // mid-game picks up the current round where it is
+    const loadGame = async () => {
+      let snapshot;
+      try {
+        snapshot = (await instance.get(`/lobby/${lobbyId}/snapshot`)).data;
+      } catch (error) {
         alert("Failed to load lobby details.");
         navigate("/");
+        return;
+      }
+
+      const { lobby, players, phase, rounds, scoreboard } = snapshot;
+      setAnswerMode(lobby.answer_mode || "text");
+      setPlayers(players.map((player) => player.player_name));
+      // Start from the server's scoreboard, zero for everyone else
+      const initialScores = {};
+      players.forEach((player) => {
+        initialScores[player.player_name] = 0;
       });
-  }, [lobbyId, navigate]);
+      scoreboard.forEach((entry) => {
+        initialScores[entry.player_name] = entry.score;
+      });
+      setScores(initialScores);
 
-  // Fetch initial list of players
-  useEffect(() => {
-    const fetchPlayers = async () => {
+      const isCreator = lobby.creator_id === storedUserId;
+      setIsHost(isCreator);
+      if (!rounds.version) {
+        // No rounds yet: if the player is the host, kick off round generation
+        if (isCreator && phase === "in_game") {
+          console.log("We are host - call startRound()");
+          startRound();
+        }
+        return;
+      }
+
+      // Fetch the rounds the snapshot refers to; a 409 means they were
+      // regenerated since, and the "round_data_ready" event brings them
       try {
-        const participantsResponse = await instance.get(
-          `/lobby/${lobbyId}/participants`
-        );
-        setPlayers(participantsResponse.data.players);
-        // Initialize scores to zero for each player
-        const initialScores = {};
-        participantsResponse.data.players.forEach((player) => {
-          initialScores[player] = 0;
+        const roundsResponse = await instance.get(`/lobby/${lobbyId}/rounds`, {
+          params: { version: rounds.version },
         });
-        setScores(initialScores);
+        setRoundData(roundsResponse.data.roundData);
+        setIsGenerating(false);
       } catch (error) {
-        console.error("Error fetching participants:", error);
+        console.error("Error fetching round data:", error);
+        return;
+      }
+
+      if (phase === "finished") {
+        onGameEnd();
+      } else if (rounds.current_round !== null) {
+        setCurrentSubtopicIndex(rounds.current_round);
+        // Time the deadline against the server's clock
+        setTimeLeft(
+          Math.max(0, Math.round(rounds.round_deadline - snapshot.server_time))
+        );
       }
     };
-    fetchPlayers();
-  }, [lobbyId]);
+    loadGame();
+  }, [lobbyId, navigate]);
 
   // Host starts the round by requesting round data generation
   const startRound = async () => {
@@ -93,16 +120,13 @@ const GameScreen = () => {
     }
   };
 
-  // Timer effect for each subtopic
+  // Countdown display for each subtopic; the server ends rounds and starts the next
   useEffect(() => {
     if (timeLeft > 0) {
       const timer = setTimeout(() => setTimeLeft(timeLeft - 1), 1000);
       return () => clearTimeout(timer);
-    } else if (timeLeft === 0 && currentSubtopicIndex >= 0) {
-      // End of subtopic, advance to the next one
-      handleEndOfSubtopic();
     }
-  }, [timeLeft, currentSubtopicIndex]);
+  }, [timeLeft]);
 
   const handleIncomingMessage = useCallback(
     (message) => {
@@ -111,12 +135,39 @@ const GameScreen = () => {
         switch (parsedMessage.type) {
           case "round_data_ready":
             setRoundData(parsedMessage.roundData);
-            setCurrentSubtopicIndex(0);
-            setTimeLeft(60); // Start countdown for the first subtopic
-            setHasGuessedCorrectly(false); // Reset correct guess state for each player
-            setCorrectGuessCount(0); // Reset correct guess count for the new round
             setIsGenerating(false); // Stop loading
             break;
+          case "round_started":
+            // Advance to the subtopic the server started
+            setCurrentSubtopicIndex(parsedMessage.subtopicIndex);
+            setTimeLeft(
+              Math.round(parsedMessage.deadline - parsedMessage.startedAt)
+            );
+            setChatMessages([]); // Clear chat for the new round
+            setHasGuessedCorrectly(false); // Reset correct guess state for the new subtopic
+            setCorrectGuessCount(0); // Reset correct guess count for the new subtopic
+            setPickedSentence(null); // Everyone gets a new pick
+            break;
+          case "round_ended":
+            setTimeLeft(0); // Submissions are closed
+            break;
+          case "game_over":
+            onGameEnd();
+            break;
+          case "narrative_start":
+            // A (re)started narrative replaces whatever was streamed for it before
+            setStreamedNarratives((prev) => ({
+              ...prev,
+              [parsedMessage.subtopicIndex]: "",
+            }));
+            break;
+          case "narrative_chunk":
+            setStreamedNarratives((prev) => ({
+              ...prev,
+              [parsedMessage.subtopicIndex]:
+                (prev[parsedMessage.subtopicIndex] || "") + parsedMessage.text,
+            }));
+            break;
           case "round_error":
             console.error("Error generating round:", parsedMessage.message);
             break;
@@ -130,11 +181,10 @@ const GameScreen = () => {
             ]);
             break;
           case "correct_guess":
-            // Update score and notify players that someone got it right
+            // Update score from the server's scoreboard and notify players that someone got it right
             setScores((prevScores) => ({
               ...prevScores,
-              [parsedMessage.playerName]:
-                prevScores[parsedMessage.playerName] + timeLeft,
+              [parsedMessage.playerName]: parsedMessage.totalScore,
             }));
             setChatMessages((prevMessages) => [
               ...prevMessages,
@@ -148,17 +198,19 @@ const GameScreen = () => {
               setHasGuessedCorrectly(true); // Set that the current player guessed correctly
             }
 
-            // Update correct guess count
-            setCorrectGuessCount((prevCount) => {
-              const newCount = prevCount + 1;
-
-              // If everyone has guessed correctly, set the timer to zero
-              if (newCount === players.length) {
-                setTimeLeft(0);
-              }
-
-              return newCount;
-            });
+            // Update correct guess count; the server ends the round once everyone has it
+            setCorrectGuessCount((prevCount) => prevCount + 1);
+            break;
+          case "player_left":
+            setPlayers((prevPlayers) =>
+              prevPlayers.filter(
+                (player) => player !== parsedMessage.playerName
+              )
+            );
+            break;
+          case "start_game":
+          case "session":
+            // Lobby-phase events still in flight on the shared socket
             break;
           case "lobby_closed":
             alert(
@@ -178,20 +230,6 @@ const GameScreen = () => {
 
   const sendMessage = useWebSocket(lobbyId, userId, handleIncomingMessage);
 
-  const handleEndOfSubtopic = () => {
-    if (currentSubtopicIndex + 1 < roundData.subtopics.length) {
-      // Advance to the next subtopic
-      setCurrentSubtopicIndex(currentSubtopicIndex + 1);
-      setTimeLeft(60); // Restart timer for the next subtopic
-      setChatMessages([]); // Clear chat for the new round
-      setHasGuessedCorrectly(false); // Reset correct guess state for the new subtopic
-      setCorrectGuessCount(0); // Reset correct guess count for the new subtopic
-    } else {
-      // End of the game
-      onGameEnd();
-    }
-  };
-
   const onGameEnd = () => {
     setTimeLeft(0);
     alert("The game has ended! Check out the final scores.");
@@ -222,12 +260,37 @@ const GameScreen = () => {
     }
   };
 
+  // Handle picking a sentence as the answer (sentence answer mode); the
+  // server takes one pick per player and round
+  const pickSentence = async (sentenceIndex) => {
+    if (timeLeft <= 0 || hasGuessedCorrectly || pickedSentence !== null) return;
+
+    setPickedSentence(sentenceIndex);
+    try {
+      await instance.post(
+        `/submit-answer`,
+        {
+          sentenceIndex,
+          user_id: userId,
+          playerName: playerName,
+          subtopicIndex: currentSubtopicIndex,
+        },
+        { params: { lobby_id: lobbyId } }
+      );
+    } catch (error) {
+      console.error("Error submitting the answer:", error);
+    }
+  };
+
   return (
     <div className="game-screen">
       {isGenerating ? (
         <div className="loading-container">
           <Cube isSmall={false} />
           <p>Generating questions...</p>
+          {streamedNarratives[0] && (
+            <p className="paragraph-chunk">{streamedNarratives[0]}</p>
+          )}
         </div>
       ) : (
         <>
@@ -256,7 +319,7 @@ const GameScreen = () => {
             <ul>
               {players.map((player, index) => (
                 <li key={index}>
-                  {player} : {scores[player] || 0}
+                  {player} : {(scores[player] || 0).toFixed(2)}
                 </li>
               ))}
             </ul>
@@ -264,11 +327,33 @@ const GameScreen = () => {
 
           {/* Narrative Section */}
           <div className="paragraphs-container">
-            {roundData && currentSubtopicIndex >= 0 && (
-              <p className="paragraph-chunk">
-                {roundData.subtopics[currentSubtopicIndex].narrative}
-              </p>
-            )}
+            {roundData &&
+              currentSubtopicIndex >= 0 &&
+              (answerMode === "sentence" &&
+              roundData.subtopics[currentSubtopicIndex].sentences?.length ? (
+                <p className="paragraph-chunk">
+                  {roundData.subtopics[currentSubtopicIndex].sentences.map(
+                    (sentence, index) => (
+                      <span
+                        key={index}
+                        onClick={() => pickSentence(index)}
+                        style={{
+                          cursor:
+                            pickedSentence === null ? "pointer" : "default",
+                          textDecoration:
+                            pickedSentence === index ? "underline" : "none",
+                        }}
+                      >
+                        {sentence}{" "}
+                      </span>
+                    )
+                  )}
+                </p>
+              ) : (
+                <p className="paragraph-chunk">
+                  {roundData.subtopics[currentSubtopicIndex].narrative}
+                </p>
+              ))}
           </div>
 
           {/* Chat Box */}
@@ -1,4 +1,4 @@
-import { useCallback, useEffect, useRef, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { v4 as uuidv4 } from "uuid";
 import useWebSocket from "../hooks/useWebSocket";
@@ -17,13 +17,13 @@ function PlayerTable() {
   );
   const [inviteLink, setInviteLink] = useState("");
   const [userId, setUserId] = useState(localStorage.getItem("user_id") || null);
-  const isGameStarting = useRef(false); // Track if the game is starting
 
   useEffect(() => {
     const checkHostAndFetchPlayers = async () => {
       try {
-        const response = await instance.get(`/lobby/${lobbyId}`);
-        const { creator_id } = response.data;
+        // One call for the host and the players
+        const response = await instance.get(`/lobby/${lobbyId}/snapshot`);
+        const { creator_id } = response.data.lobby;
 
         let storedUserId = localStorage.getItem("user_id");
         if (!storedUserId) {
@@ -38,10 +38,7 @@ function PlayerTable() {
           setIsHost(true);
         }
 
-        const participantsResponse = await instance.get(
-          `/lobby/${lobbyId}/participants`
-        );
-        setPlayers(participantsResponse.data.players);
+        setPlayers(response.data.players.map((player) => player.player_name));
       } catch (error) {
         console.error("Error fetching lobby details:", error);
         alert("Failed to fetch lobby details. Please ensure the lobby exists.");
@@ -75,10 +72,14 @@ function PlayerTable() {
             );
             break;
           case "start_game":
-            isGameStarting.current = true; // Set the flag to indicate that the game is starting
-            sendMessage(JSON.stringify({ type: "transitioning_to_game" })); // Notify server of transition
+            // The game page picks up this same socket
             navigate(`/game/${lobbyId}`);
             break;
+          case "session":
+            if (parsedMessage.phase === "in_game") {
+              navigate(`/game/${lobbyId}`);
+            }
+            break;
           case "lobby_closed":
             alert(
               parsedMessage.message || "The lobby has been closed by the host."
@@ -117,12 +118,8 @@ function PlayerTable() {
   };
 
   const handleStartGame = () => {
-    isGameStarting.current = true; // Set the flag to indicate that the game is starting
+    // Everyone, the host included, moves on when the start_game broadcast arrives
     sendMessage(JSON.stringify({ type: "start_game_initiated" }));
-    setTimeout(() => {
-      sendMessage(JSON.stringify({ type: "transitioning_to_game" })); // Notify server of transition
-      navigate(`/game/${lobbyId}`);
-    }, 1000); // Add a small delay for smoother transition
   };
 
   return (
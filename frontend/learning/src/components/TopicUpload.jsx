@@ -6,6 +6,7 @@ import Cube from "./Cube";
 
 const TopicUpload = () => {
   const [topic, setTopic] = useState("");
+  const [pickSentence, setPickSentence] = useState(false); // Answer by picking the wrong sentence
   const [loading, setLoading] = useState(false);
   const navigate = useNavigate();
 
@@ -23,7 +24,10 @@ const TopicUpload = () => {
 
     try {
       // Create a lobby with the provided topic
-      const response = await instance.post("/create-lobby", { topic });
+      const response = await instance.post("/create-lobby", {
+        topic,
+        answer_mode: pickSentence ? "sentence" : "text",
+      });
 
       const { lobby_id, creator_id } = response.data;
 
@@ -56,6 +60,14 @@ const TopicUpload = () => {
     onChange={handleTopicChange}
     style={{ marginRight: "10px" }}
   />
+  <label style={{ marginRight: "10px" }}>
+    <input
+      type="checkbox"
+      checked={pickSentence}
+      onChange={(e) => setPickSentence(e.target.checked)}
+    />
+    Pick the wrong sentence
+  </label>
   <button type="submit" disabled={loading}>
     {loading ? "Creating Lobby..." : "Start Lobby"}
   </button>
@@ -1,9 +1,57 @@
 // src/hooks/useWebSocket.js
 import { useEffect, useRef } from "react";
 
+// How long an unused session socket stays open, so the lobby page can hand
+// it to the game page without reconnecting
+const CLOSE_GRACE_MS = 5000;
+
+// One session socket per lobby and user, shared by every mounted component
+const sessions = new Map();
+
+function openSession(lobbyId, userId) {
+  // Determine the WebSocket protocol
+  const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+  const websocketUrl = import.meta.env.VITE_APP_WEBSOCKET_URL;
+
+  const wsUrl = `${protocol}://${websocketUrl}/ws/${lobbyId}?user_id=${userId}`;
+
+  const session = {
+    socket: new WebSocket(wsUrl),
+    handlers: new Set(),
+    closeTimer: null,
+  };
+
+  session.socket.onopen = () => {
+    console.log("WebSocket connection established");
+  };
+
+  session.socket.onmessage = (event) => {
+    console.log("WebSocket message received:", event.data);
+    session.handlers.forEach((handler) => handler(event.data));
+  };
+
+  session.socket.onclose = (event) => {
+    console.log(
+      `WebSocket connection closed: Code ${event.code}, Reason: ${event.reason}`
+    );
+    if (sessions.get(`${lobbyId}:${userId}`) === session) {
+      sessions.delete(`${lobbyId}:${userId}`);
+    }
+  };
+
+  session.socket.onerror = (error) => {
+    console.error("WebSocket error:", error);
+  };
+
+  return session;
+}
+
 /**
  * Custom React hook to manage WebSocket connections.
  *
+ * Components of the same lobby and user share one session socket, which
+ * stays open from the lobby page through the game.
+ *
  * @param {string} lobbyId - The unique identifier for the lobby.
  * @param {string} userId - The unique identifier for the user.
  * @param {function} onMessageReceived - Callback function to handle incoming messages.
@@ -11,7 +59,7 @@ import { useEffect, useRef } from "react";
  * @returns {function} sendMessage - Function to send messages through the WebSocket.
  */
 function useWebSocket(lobbyId, userId, onMessageReceived) {
-  const ws = useRef(null);
+  const session = useRef(null);
   const messageHandlerRef = useRef(onMessageReceived);
 
   useEffect(() => {
@@ -21,50 +69,44 @@ function useWebSocket(lobbyId, userId, onMessageReceived) {
   useEffect(() => {
     if (!lobbyId || !userId) return;
 
-    // Determine the WebSocket protocol
-    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
-    const websocketUrl = import.meta.env.VITE_APP_WEBSOCKET_URL;
-
-    const wsUrl = `${protocol}://${websocketUrl}/ws/${lobbyId}?user_id=${userId}`;
-
-    ws.current = new WebSocket(wsUrl);
-
-    ws.current.onopen = () => {
-      console.log("WebSocket connection established");
-    };
+    const key = `${lobbyId}:${userId}`;
+    let current = sessions.get(key);
+    if (!current) {
+      current = openSession(lobbyId, userId);
+      sessions.set(key, current);
+    }
+    clearTimeout(current.closeTimer);
 
-    ws.current.onmessage = (event) => {
-      console.log("WebSocket message received:", event.data);
+    const handler = (data) => {
       if (messageHandlerRef.current) {
-        messageHandlerRef.current(event.data);
+        messageHandlerRef.current(data);
       }
     };
+    current.handlers.add(handler);
+    session.current = current;
 
-    ws.current.onclose = (event) => {
-      console.log(
-        `WebSocket connection closed: Code ${event.code}, Reason: ${event.reason}`
-      );
-    };
-
-    ws.current.onerror = (error) => {
-      console.error("WebSocket error:", error);
-    };
-
-    // Cleanup on unmount
+    // Cleanup on unmount; the socket closes once no page has picked it up
     return () => {
-      if (ws.current) {
-        ws.current.close();
+      current.handlers.delete(handler);
+      if (current.handlers.size === 0) {
+        current.closeTimer = setTimeout(() => {
+          if (current.handlers.size === 0) {
+            sessions.delete(key);
+            current.socket.close();
+          }
+        }, CLOSE_GRACE_MS);
       }
     };
   }, [lobbyId, userId]);
 
   const sendMessage = (message) => {
-    if (ws.current && ws.current.readyState === WebSocket.OPEN) {
-      ws.current.send(message);
+    const ws = session.current && session.current.socket;
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(message);
     } else {
       console.error(
         "WebSocket is not open. Ready state:",
-        ws.current.readyState
+        ws && ws.readyState
       );
     }
   };